@@ -1,14 +1,23 @@
 import flet as ft
 import os
-import time
 import threading
-import csv
 import json
 from datetime import datetime
 from pathlib import Path
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
 from dotenv import load_dotenv
+from dm_broadcast.campaign import (
+    CampaignRunner, campanha_para_retomar, campos_disponiveis, conectar,
+    destinatarios_das_listas, log_csv_da_campanha,
+)
+from dm_broadcast.catalog import ListCatalog
+from dm_broadcast.journal import Journal
+from dm_broadcast.logsink import LogHistory, LogSink
+from dm_broadcast.media import MediaCatalog
+from dm_broadcast.pool import tokens_do_ambiente
+from dm_broadcast.schedule import FORMATO_INICIO, FORMATO_JANELA, DeliverySchedule, ScheduleError
+from dm_broadcast.template import Template
+from dm_broadcast.watcher import DirectoryWatcher
+from dm_broadcast.workspaces import MultiWorkspaceRunner, workspaces_do_ambiente
 
 # =========================
 # CONFIGURAÇÃO
@@ -17,19 +26,44 @@ LISTAS_DIR = Path("listas")
 LOG_DIR = Path("logs")
 ARQUIVOS_DIR = Path("arquivos")
 IMAGENS_DIR = Path("imagens")
+CACHE_DIR = Path("cache")
 CONFIG_FILE = Path("config.json")
+JOURNAL_DB = LOG_DIR / "envios.db"
+CHECKPOINT_DIR = LOG_DIR / "checkpoints"
+LOG_UI_DIR = LOG_DIR / "interface"
+# Entradas mantidas na tela; o restante fica só no histórico em disco
+LOG_TELA_MAX = 500
 
 # Criar diretórios se não existirem
-for dir_path in [LISTAS_DIR, LOG_DIR, ARQUIVOS_DIR, IMAGENS_DIR]:
+for dir_path in [LISTAS_DIR, LOG_DIR, ARQUIVOS_DIR, IMAGENS_DIR, CACHE_DIR]:
     dir_path.mkdir(exist_ok=True)
 
+# Diário de entregas (SQLite) com todo o histórico de campanhas
+journal = Journal(JOURNAL_DB)
+
 load_dotenv()
-SLACK_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+# Um ou mais tokens de bot do mesmo workspace (SLACK_BOT_TOKEN e/ou SLACK_BOT_TOKENS)
+SLACK_TOKENS = tokens_do_ambiente()
+# Vários workspaces (SLACK_WORKSPACES=br,us com SLACK_BOT_TOKEN_BR, SLACK_BOT_TOKEN_US...)
+WORKSPACES = workspaces_do_ambiente()
+# Validade do cache de usuários (segundos)
+DIRETORIO_TTL = float(os.getenv("SLACK_DIRETORIO_TTL", "3600"))
+# Canal privado opcional onde os anexos da campanha são publicados uma vez
+SLACK_CANAL_ANEXOS = os.getenv("SLACK_CANAL_ANEXOS") or None
 
-if SLACK_TOKEN:
-    client = WebClient(token=SLACK_TOKEN)
+if WORKSPACES:
+    # Cada campanha roda um processo por workspace, com tokens, caches e limitadores próprios
+    pool = None
+    diretorio = None
+    print(f"🌐 Workspaces: {', '.join(WORKSPACES)}")
+    for nome in [nome for nome, tokens in WORKSPACES.items() if not tokens]:
+        print(f"⚠️ Workspace {nome} sem token (SLACK_BOT_TOKEN_{nome.upper()}): campanhas com destinatários nele não iniciam")
+elif SLACK_TOKENS:
+    # Cada token tem o seu limitador por método (tiers do Slack); os envios são divididos entre eles
+    pool, diretorio = conectar(SLACK_TOKENS, CACHE_DIR, ttl=DIRETORIO_TTL)
 else:
-    client = None
+    pool = None
+    diretorio = None
     print("⚠️ Token Slack não encontrado. Modo de teste ativado.")
 
 # =========================
@@ -53,6 +87,12 @@ EXTENSOES_IMAGEM = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.
 EXTENSOES_VIDEO = ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.mkv', '.webm']
 EXTENSOES_ARQUIVO = ['.txt', '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.csv', '.ppt', '.pptx', '.zip', '.rar']
 
+# Uma leitura por pasta, extensões sem diferenciar maiúsculas
+midia = MediaCatalog({
+    IMAGENS_DIR: EXTENSOES_IMAGEM + EXTENSOES_VIDEO,
+    ARQUIVOS_DIR: EXTENSOES_ARQUIVO,
+})
+
 # =========================
 # FUNÇÕES AUXILIARES
 # =========================
@@ -68,42 +108,13 @@ def salvar_config(config):
     with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
         json.dump(config, f, ensure_ascii=False, indent=2)
 
-def create_log_csv():
-    """Cria arquivo CSV para logs"""
-    log_file = LOG_DIR / f"log_envio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    return log_file
-
-def save_to_csv(log_file, data):
-    """Salva dados no CSV de log"""
-    file_exists = log_file.exists()
-    
-    with open(log_file, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(['Data', 'Hora', 'Usuario', 'Status', 'Lista', 'Mensagem', 'Arquivos'])
-        writer.writerow(data)
-
-def normalize_name(name):
-    """Normaliza nomes para comparação"""
-    return name.strip().lower()
-
 def listar_arquivos_midia():
-    """Lista arquivos de mídia disponíveis"""
-    arquivos = []
-    
-    # Imagens
-    for ext in EXTENSOES_IMAGEM:
-        arquivos.extend(list(IMAGENS_DIR.glob(f"*{ext}")))
-    
-    # Vídeos
-    for ext in EXTENSOES_VIDEO:
-        arquivos.extend(list(IMAGENS_DIR.glob(f"*{ext}")))
-    
-    # Outros arquivos
-    for ext in EXTENSOES_ARQUIVO:
-        arquivos.extend(list(ARQUIVOS_DIR.glob(f"*{ext}")))
-    
-    return arquivos
+    """Lista arquivos de mídia disponíveis (em cache até a pasta mudar)"""
+    return midia.arquivos()
+
+def midia_suportada(arquivo):
+    """Indica se o arquivo entra na lista de mídia do seu diretório"""
+    return midia.suportado(arquivo)
 
 # =========================
 # APLICATIVO PRINCIPAL
@@ -127,6 +138,11 @@ def main(page: ft.Page):
     # =========================
     listas_data = {}
     listas_checkboxes = {}
+    listas_linhas = {}  # nome -> ft.Row reaproveitada entre recargas
+    catalogo_listas = ListCatalog(LISTAS_DIR)
+    arquivos_botoes = {}  # Path -> botão de seleção
+    # Botões, observador e recargas manuais mexem nas mesmas estruturas
+    arquivos_lock = threading.RLock()
     stats = {
         "total_listas": 0,
         "total_usuarios": 0,
@@ -141,7 +157,11 @@ def main(page: ft.Page):
     # FUNÇÕES DO APLICATIVO
     # =========================
     def log(msg, tipo="info"):
-        """Adiciona entrada ao log com cores"""
+        """Enfileira uma entrada de log (não espera a interface)"""
+        log_sink.escrever((datetime.now().strftime("%H:%M:%S"), msg, tipo))
+    
+    def linha_log(timestamp, msg, tipo):
+        """Monta a linha visual de uma entrada do log"""
         colors = {
             "info": COLORS["text"],
             "success": COLORS["success"],
@@ -150,73 +170,139 @@ def main(page: ft.Page):
             "system": COLORS["primary"]
         }
         
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        emoji = {
+        emojis = {
             "info": "ℹ️",
             "success": "✅",
             "warning": "⚠️",
             "error": "❌",
             "system": "🔧"
-        }.get(tipo, "ℹ️")
+        }
         
-        log_entry = ft.Row([
+        return ft.Row([
             ft.Text(f"[{timestamp}] ", size=12, color=colors["system"], weight=ft.FontWeight.BOLD),
-            ft.Text(f"{emoji} ", size=13),
+            ft.Text(f"{emojis.get(tipo, 'ℹ️')} ", size=13),
             ft.Text(msg, size=13, color=colors.get(tipo, COLORS["text"])),
         ], tight=True)
+    
+    def renderizar_log(lote):
+        """Adiciona um lote de entradas ao log e atualiza a página uma vez"""
+        # Só as últimas LOG_TELA_MAX entradas viram controles
+        for entrada in lote[-LOG_TELA_MAX:]:
+            log_area.controls.append(linha_log(*entrada))
+        
+        excesso = len(log_area.controls) - LOG_TELA_MAX
+        if excesso > 0:
+            del log_area.controls[:excesso]
         
-        log_area.controls.append(log_entry)
         page.update()
     
+    # Histórico completo da sessão vai para disco; a tela guarda um buffer circular
+    historico_log = LogHistory(LOG_UI_DIR / f"sessao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+    # Entradas do log chegam à tela em lotes de no máximo 100 ms
+    log_sink = LogSink(renderizar_log, historico=historico_log)
+    pagina_historico = 0
+    
     def limpar_log():
         log_area.controls.clear()
         log("Log limpo", "system")
         page.update()
     
+    def mostrar_pagina_historico(numero):
+        """Carrega uma página do histórico em disco no visualizador"""
+        nonlocal pagina_historico
+        pagina_historico = max(0, min(numero, historico_log.paginas() - 1))
+        historico_area.controls = [linha_log(*entrada) for entrada in historico_log.pagina(pagina_historico)]
+        historico_info.value = (f"Página {pagina_historico + 1} de {historico_log.paginas()} "
+                                f"({historico_log.total()} entradas)")
+        historico_anterior_btn.disabled = pagina_historico == 0
+        historico_proxima_btn.disabled = pagina_historico >= historico_log.paginas() - 1
+        page.update()
+    
+    def abrir_historico(e):
+        """Abre o histórico completo do log, começando pela página mais recente"""
+        page.dialog = historico_dialog
+        historico_dialog.open = True
+        mostrar_pagina_historico(historico_log.paginas() - 1)
+    
+    def icone_arquivo(arquivo):
+        """Ícone baseado na extensão"""
+        ext = arquivo.suffix.lower()
+        if ext in EXTENSOES_IMAGEM:
+            return "🖼️"
+        if ext in EXTENSOES_VIDEO:
+            return "🎬"
+        return "📎"
+    
+    def criar_botao_arquivo(arquivo):
+        """Cria o botão que seleciona/desseleciona um arquivo"""
+        btn = ft.ElevatedButton(
+            content=ft.Row([
+                ft.Text(icone_arquivo(arquivo), size=16),
+                ft.Text(arquivo.name, size=12),
+            ]),
+            width=400,
+            height=35,
+            style=ft.ButtonStyle(
+                bgcolor=COLORS["card_bg"],
+                color=COLORS["text"],
+            ),
+            on_click=lambda e, a=arquivo: alternar_selecao_arquivo(a),
+        )
+        arquivos_botoes[arquivo] = btn
+        estilizar_botao_arquivo(arquivo)
+        return btn
+    
+    def estilizar_botao_arquivo(arquivo):
+        """Reflete no botão se o arquivo está selecionado"""
+        btn = arquivos_botoes.get(arquivo)
+        if btn is None:
+            return
+        is_selected = arquivo in arquivos_selecionados
+        btn.content.controls[0].value = "✅ " if is_selected else icone_arquivo(arquivo)
+        btn.style.bgcolor = COLORS["primary"] if is_selected else COLORS["card_bg"]
+    
+    def mostrar_botoes_arquivos():
+        """Coloca os botões existentes no container (ou o aviso de vazio)"""
+        if arquivos_botoes:
+            arquivos_container.controls = list(arquivos_botoes.values())
+        else:
+            arquivos_container.controls = [
+                ft.Text("📭 Nenhum arquivo encontrado", color=COLORS["warning"], italic=True)
+            ]
+    
     def atualizar_lista_arquivos():
         """Atualiza a lista de arquivos de mídia"""
-        arquivos_container.controls.clear()
-        
-        arquivos = listar_arquivos_midia()
-        
-        if not arquivos:
-            arquivos_container.controls.append(
-                ft.Text("📭 Nenhum arquivo encontrado", color=COLORS["warning"], italic=True)
-            )
-        else:
-            for arquivo in arquivos:
-                # Determinar ícone baseado na extensão
-                ext = arquivo.suffix.lower()
-                if ext in EXTENSOES_IMAGEM:
-                    icon = "🖼️"
-                elif ext in EXTENSOES_VIDEO:
-                    icon = "🎬"
-                else:
-                    icon = "📎"
-                
-                # Verificar se o arquivo está selecionado
-                is_selected = arquivo in arquivos_selecionados
-                
-                # Criar botão para selecionar/deselecionar arquivo
-                btn = ft.ElevatedButton(
-                    content=ft.Row([
-                        ft.Text("✅ " if is_selected else icon, size=16),
-                        ft.Text(arquivo.name, size=12),
-                    ]),
-                    width=400,
-                    height=35,
-                    style=ft.ButtonStyle(
-                        bgcolor=COLORS["primary"] if is_selected else COLORS["card_bg"],
-                        color=COLORS["text"],
-                    ),
-                    on_click=lambda e, a=arquivo: alternar_selecao_arquivo(a),
-                )
-                
-                arquivos_container.controls.append(btn)
-        
-        atualizar_info_arquivos()
-        page.update()
+        with arquivos_lock:
+            arquivos_botoes.clear()
+            for arquivo in listar_arquivos_midia():
+                criar_botao_arquivo(arquivo)
+            mostrar_botoes_arquivos()
+            
+            atualizar_info_arquivos()
+            page.update()
+    
+    def aplicar_mudancas_midia(arquivos):
+        """Adiciona ou remove apenas os botões dos arquivos que mudaram no disco"""
+        with arquivos_lock:
+            mudou = False
+            for arquivo in sorted(arquivos):
+                existe = arquivo.is_file() and midia_suportada(arquivo)
+                if existe and arquivo not in arquivos_botoes:
+                    criar_botao_arquivo(arquivo)
+                    log(f"📥 Novo arquivo: {arquivo.name}", "info")
+                    mudou = True
+                elif not existe and arquivo in arquivos_botoes:
+                    del arquivos_botoes[arquivo]
+                    if arquivo in arquivos_selecionados:
+                        arquivos_selecionados.remove(arquivo)
+                    log(f"📤 Arquivo removido do disco: {arquivo.name}", "warning")
+                    mudou = True
+            if not mudou:
+                return
+            mostrar_botoes_arquivos()
+            atualizar_info_arquivos()
+            update_dashboard()
+            page.update()
     
     def alternar_selecao_arquivo(arquivo_path):
         """Alterna a seleção de um arquivo"""
@@ -227,7 +313,9 @@ def main(page: ft.Page):
             arquivos_selecionados.append(arquivo_path)
             log(f"Arquivo selecionado: {arquivo_path.name}", "info")
         
-        atualizar_lista_arquivos()
+        estilizar_botao_arquivo(arquivo_path)
+        atualizar_info_arquivos()
+        page.update()
     
     def atualizar_info_arquivos():
         """Atualiza a informação sobre arquivos selecionados"""
@@ -284,72 +372,112 @@ def main(page: ft.Page):
         
         page.update()
     
-    def carregar_listas():
-        """Carrega listas do diretório"""
-        listas_data.clear()
-        listas_checkboxes.clear()
-        listas_container.controls.clear()
+    def criar_linha_lista(nome):
+        """Cria checkbox e botão de edição de uma lista"""
+        lista_btn = ft.ElevatedButton(
+            content=ft.Row([
+                ft.Text("📄", size=16),
+                ft.Text(f"{nome} ({len(listas_data[nome])} users)", size=13),
+            ]),
+            width=350,
+            height=40,
+            style=ft.ButtonStyle(
+                bgcolor=COLORS["card_bg"],
+                color=COLORS["text"],
+            ),
+            on_click=lambda e, n=nome: abrir_editor_lista(catalogo_listas.caminho(n)),
+        )
         
-        stats["total_listas"] = 0
-        stats["total_usuarios"] = 0
-        stats["usuarios_por_lista"].clear()
+        # Checkbox para seleção
+        checkbox = ft.Checkbox(
+            value=False,
+            on_change=lambda e, n=nome: on_checkbox_change(e, n),
+        )
         
-        arquivos_txt = list(LISTAS_DIR.glob("*.txt"))
+        listas_checkboxes[nome] = checkbox
+        listas_linhas[nome] = ft.Row([
+            checkbox,
+            lista_btn,
+        ], spacing=10)
+    
+    def remover_linha_lista(nome):
+        listas_data.pop(nome, None)
+        listas_checkboxes.pop(nome, None)
+        listas_linhas.pop(nome, None)
+    
+    def aplicar_listas(alteradas, removidas):
+        """Atualiza só as linhas das listas alteradas/removidas e o painel"""
+        for nome in removidas:
+            remover_linha_lista(nome)
         
-        if not arquivos_txt:
-            listas_container.controls.append(
-                ft.Text("📭 Nenhuma lista encontrada", color=COLORS["warning"], italic=True)
-            )
+        for nome in alteradas:
+            nomes = catalogo_listas.nomes(nome)
+            if not nomes:
+                remover_linha_lista(nome)
+                continue
+            listas_data[nome] = nomes
+            if nome in listas_linhas:
+                # Controle existente: só o contador muda
+                listas_linhas[nome].controls[1].content.controls[1].value = f"{nome} ({len(nomes)} users)"
+            else:
+                criar_linha_lista(nome)
+        
+        if listas_linhas:
+            listas_container.controls = [listas_linhas[nome] for nome in sorted(listas_linhas)]
         else:
-            for arquivo in arquivos_txt:
-                try:
-                    with open(arquivo, "r", encoding="utf-8") as f:
-                        nomes = [normalize_name(l) for l in f if l.strip()]
-                    
-                    if nomes:
-                        listas_data[arquivo.name] = nomes
-                        
-                        stats["total_listas"] += 1
-                        stats["total_usuarios"] += len(nomes)
-                        stats["usuarios_por_lista"][arquivo.name] = len(nomes)
-                        
-                        # Botão para editar lista
-                        lista_btn = ft.ElevatedButton(
-                            content=ft.Row([
-                                ft.Text("📄", size=16),
-                                ft.Text(f"{arquivo.name} ({len(nomes)} users)", size=13),
-                            ]),
-                            width=350,
-                            height=40,
-                            style=ft.ButtonStyle(
-                                bgcolor=COLORS["card_bg"],
-                                color=COLORS["text"],
-                            ),
-                            on_click=lambda e, a=arquivo: abrir_editor_lista(a),
-                        )
-                        
-                        # Checkbox para seleção
-                        checkbox = ft.Checkbox(
-                            value=False,
-                            on_change=lambda e, n=arquivo.name: on_checkbox_change(e, n),
-                        )
-                        
-                        listas_checkboxes[arquivo.name] = checkbox
-                        
-                        listas_container.controls.append(
-                            ft.Row([
-                                checkbox,
-                                lista_btn,
-                            ], spacing=10)
-                        )
-                
-                except Exception as e:
-                    log(f"Erro ao ler {arquivo.name}: {str(e)}", "error")
+            listas_container.controls = [
+                ft.Text("📭 Nenhuma lista encontrada", color=COLORS["warning"], italic=True)
+            ]
+        
+        stats["usuarios_por_lista"] = {nome: len(nomes) for nome, nomes in sorted(listas_data.items())}
+        stats["total_listas"] = len(listas_data)
+        stats["total_usuarios"] = sum(stats["usuarios_por_lista"].values())
         
         update_dashboard()
-        log(f"Carregadas {stats['total_listas']} listas com {stats['total_usuarios']} usuários", "success")
         page.update()
     
+    def carregar_listas():
+        """Recarrega apenas as listas que mudaram desde a última leitura"""
+        with arquivos_lock:
+            alteradas, removidas, erros = catalogo_listas.atualizar()
+            
+            for nome, erro in erros.items():
+                log(f"Erro ao ler {nome}: {erro}", "error")
+            
+            aplicar_listas(alteradas, removidas)
+            log(f"Carregadas {stats['total_listas']} listas com {stats['total_usuarios']} usuários"
+                f" ({len(alteradas)} relida(s), {len(removidas)} removida(s))", "success")
+    
+    def aplicar_mudancas_listas(arquivos):
+        """Relê apenas os arquivos de lista apontados pelo observador"""
+        with arquivos_lock:
+            alteradas, removidas = [], []
+            for arquivo in arquivos:
+                try:
+                    resultado = catalogo_listas.atualizar_arquivo(arquivo.name)
+                except (OSError, UnicodeDecodeError) as ex:
+                    log(f"Erro ao ler {arquivo.name}: {str(ex)}", "error")
+                    continue
+                if resultado == "alterada":
+                    alteradas.append(arquivo.name)
+                elif resultado == "removida":
+                    removidas.append(arquivo.name)
+            
+            if alteradas or removidas:
+                aplicar_listas(alteradas, removidas)
+                for nome in alteradas:
+                    log(f"🔄 Lista atualizada: {nome} ({len(catalogo_listas.nomes(nome))} users)", "info")
+                for nome in removidas:
+                    log(f"🗑️ Lista removida: {nome}", "warning")
+    
+    def ao_mudar_diretorio(diretorio, arquivos):
+        """Encaminha mudanças do observador para listas ou mídia"""
+        if diretorio == LISTAS_DIR:
+            aplicar_mudancas_listas(arquivos)
+        else:
+            midia.invalidar(diretorio)
+            aplicar_mudancas_midia(arquivos)
+    
     def on_checkbox_change(e, nome_lista):
         """Callback para mudança no checkbox"""
         # Atualizar cor do botão quando selecionado
@@ -413,23 +541,66 @@ def main(page: ft.Page):
             log("❌ Digite uma mensagem", "error")
             return
         
-        # Validar delay
+        # Campos do template precisam vir do diretório ou das colunas das listas
+        disponiveis = campos_disponiveis(catalogo_listas, selecionadas)
+        desconhecidos = Template(mensagem_input.value).desconhecidos(disponiveis)
+        if desconhecidos:
+            log(f"❌ Campo(s) desconhecido(s) na mensagem: {', '.join(desconhecidos)}", "error")
+            log(f"   Campos disponíveis: {', '.join(sorted(disponiveis))}", "info")
+            return
+        
+        # Validar delay (0 = ritmo definido apenas pelos limites do Slack)
         try:
             delay = float(delay_input.value)
         except ValueError:
             log("❌ Valor de delay inválido", "error")
             return
         
-        if delay < 1.0:
-            log("⚠️ Delay muito baixo. Mínimo recomendado: 1.0s", "warning")
+        # Agendamento opcional: início da campanha e janela no horário local de cada destinatário
+        try:
+            agenda = DeliverySchedule(inicio_input.value.strip(), janela_input.value.strip())
+        except ScheduleError as ex:
+            log(f"❌ {ex}", "error")
             return
         
         # Salvar mensagem atual
         config["ultima_mensagem"] = mensagem_input.value
         salvar_config(config)
         
+        # Coletar todos os usuários das listas selecionadas (e a lista de origem)
+        lista_de_origem = destinatarios_das_listas(catalogo_listas, selecionadas)
+        
+        parametros = {
+            "listas": selecionadas,
+            "mensagem": mensagem_input.value,
+            "arquivos": [str(a) for a in arquivos_selecionados],
+            "delay": delay,
+            "trabalhadores": int(trabalhadores_input.value),
+            "por_referencia": anexos_referencia_switch.value,
+            "permitir_reenvio": reenvio_switch.value,
+            **agenda.parametros(),
+        }
+        iniciar_envio(parametros, lista_de_origem)
+    
+    def retomar_campanha(e):
+        """Retoma a última campanha interrompida, enviando só para quem ainda não recebeu"""
+        if enviar_btn.disabled:
+            log("⚠️ Aguarde o envio atual terminar", "warning")
+            return
+        
+        retomada = campanha_para_retomar(journal, CHECKPOINT_DIR)
+        if not retomada:
+            log("Nenhuma campanha interrompida para retomar", "info")
+            return
+        
+        campanha, parametros, pendentes, concluidos = retomada
+        log(f"♻️ Retomando campanha #{campanha['id']}: {len(concluidos)} já enviada(s), {len(pendentes)} pendente(s)", "system")
+        iniciar_envio(parametros, pendentes, campanha_id=campanha["id"])
+    
+    def iniciar_envio(parametros, lista_de_origem, campanha_id=None):
+        """Executa uma campanha nova (ou retoma uma existente) em thread separada"""
         # Criar arquivo de log
-        log_file = create_log_csv()
+        log_file = log_csv_da_campanha(journal, LOG_DIR, campanha_id)
         log(f"📁 Log será salvo em: {log_file.name}", "system")
         
         # Desabilitar botão durante envio
@@ -441,165 +612,25 @@ def main(page: ft.Page):
         enviar_btn.bgcolor = COLORS["warning"]
         page.update()
         
+        # Mesmo motor da CLI; a interface só fornece o log e o botão
+        if WORKSPACES:
+            # Um processo por workspace; o log de todos vem para a mesma tela
+            motor = MultiWorkspaceRunner(
+                journal, parametros, lista_de_origem, CHECKPOINT_DIR, WORKSPACES, CACHE_DIR,
+                campos_lista=catalogo_listas.campos, canal_anexos=SLACK_CANAL_ANEXOS,
+                log=log, campanha_id=campanha_id, ttl=DIRETORIO_TTL,
+            )
+        else:
+            motor = CampaignRunner(
+                journal, parametros, lista_de_origem, CHECKPOINT_DIR,
+                pool=pool, diretorio=diretorio,
+                campos_lista=catalogo_listas.campos, canal_anexos=SLACK_CANAL_ANEXOS,
+                log=log, campanha_id=campanha_id,
+            )
+        
         def worker():
             try:
-                log(f"🚀 Iniciando envio para {len(selecionadas)} lista(s)...", "success")
-                log(f"⏱️  Delay entre mensagens: {delay}s", "info")
-                if arquivos_selecionados:
-                    log(f"📎 Enviando {len(arquivos_selecionados)} arquivo(s) anexado(s)", "info")
-                log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", "system")
-                
-                total_enviados = 0
-                total_erros = 0
-                usuarios_nao_encontrados = []
-                
-                # Coletar todos os usuários das listas selecionadas
-                usuarios_para_enviar = set()
-                for lista in selecionadas:
-                    if lista in listas_data:
-                        usuarios_para_enviar.update(listas_data[lista])
-                
-                log(f"📨 Preparando {len(usuarios_para_enviar)} mensagens...", "info")
-                
-                if client:
-                    # Modo real com Slack API
-                    try:
-                        usuarios_slack = client.users_list()["members"]
-                        usuarios_encontrados = []
-                        
-                        for user in usuarios_slack:
-                            if user.get("is_bot") or user.get("deleted"):
-                                continue
-                            
-                            nome_real = user["profile"].get("real_name", "").strip()
-                            nome_display = user["profile"].get("display_name", "").strip()
-                            
-                            nome_para_busca = nome_real or nome_display
-                            if not nome_para_busca:
-                                continue
-                            
-                            nome_normalizado = normalize_name(nome_para_busca)
-                            
-                            if nome_normalizado not in usuarios_para_enviar:
-                                continue
-                            
-                            usuarios_encontrados.append(nome_normalizado)
-                            
-                            # Personalizar mensagem
-                            texto = mensagem_input.value.replace("{{nome}}", nome_para_busca)
-                            
-                            try:
-                                # Abrir DM
-                                dm = client.conversations_open(users=user["id"])
-                                
-                                # Enviar mensagem com múltiplos arquivos se houver
-                                if arquivos_selecionados:
-                                    # Para múltiplos arquivos, precisamos enviar um a um
-                                    for i, arquivo in enumerate(arquivos_selecionados):
-                                        if arquivo.exists():
-                                            with open(arquivo, 'rb') as file:
-                                                if i == 0:
-                                                    # Primeiro arquivo inclui a mensagem
-                                                    response = client.files_upload_v2(
-                                                        channel=dm["channel"]["id"],
-                                                        file=file,
-                                                        filename=arquivo.name,
-                                                        initial_comment=texto
-                                                    )
-                                                else:
-                                                    # Arquivos subsequentes apenas o arquivo
-                                                    response = client.files_upload_v2(
-                                                        channel=dm["channel"]["id"],
-                                                        file=file,
-                                                        filename=arquivo.name
-                                                    )
-                                else:
-                                    # Sem arquivos, apenas mensagem
-                                    client.chat_postMessage(
-                                        channel=dm["channel"]["id"],
-                                        text=texto
-                                    )
-                                
-                                # Log e CSV
-                                nomes_arquivos = ", ".join([a.name for a in arquivos_selecionados]) if arquivos_selecionados else ""
-                                log_data = [
-                                    datetime.now().strftime("%Y-%m-%d"),
-                                    datetime.now().strftime("%H:%M:%S"),
-                                    nome_para_busca,
-                                    "ENVIADO",
-                                    selecionadas[0] if len(selecionadas) == 1 else "MULTIPLAS",
-                                    texto[:50] + "..." if len(texto) > 50 else texto,
-                                    nomes_arquivos
-                                ]
-                                save_to_csv(log_file, log_data)
-                                
-                                log(f"✅ Enviado para {nome_para_busca}", "success")
-                                total_enviados += 1
-                                
-                                # Delay anti-ban
-                                time.sleep(delay)
-                                
-                            except SlackApiError as api_error:
-                                error_msg = api_error.response.get('error', 'Erro desconhecido')
-                                log(f"❌ Erro para {nome_para_busca}: {error_msg}", "error")
-                                total_erros += 1
-                                time.sleep(2)
-                        
-                        # Usuários não encontrados
-                        usuarios_nao_encontrados = [u for u in usuarios_para_enviar if u not in usuarios_encontrados]
-                        
-                    except SlackApiError as e:
-                        log(f"❌ Erro geral do Slack: {e.response['error']}", "error")
-                else:
-                    # Modo de teste (simulação)
-                    log("🔄 Modo de teste ativado (simulando envios)...", "warning")
-                    
-                    for i, usuario in enumerate(usuarios_para_enviar, 1):
-                        texto = mensagem_input.value.replace("{{nome}}", usuario.title())
-                        
-                        # Log de simulação
-                        nomes_arquivos = ", ".join([a.name for a in arquivos_selecionados]) if arquivos_selecionados else ""
-                        log_data = [
-                            datetime.now().strftime("%Y-%m-%d"),
-                            datetime.now().strftime("%H:%M:%S"),
-                            usuario.title(),
-                            "SIMULADO",
-                            selecionadas[0] if len(selecionadas) == 1 else "MULTIPLAS",
-                            texto[:50] + "..." if len(texto) > 50 else texto,
-                            nomes_arquivos
-                        ]
-                        save_to_csv(log_file, log_data)
-                        
-                        log_msg = f"✅ [{i}/{len(usuarios_para_enviar)}] SIMULAÇÃO para {usuario.title()}"
-                        if arquivos_selecionados:
-                            log_msg += f" com {len(arquivos_selecionados)} arquivo(s)"
-                        log(log_msg, "success")
-                        total_enviados += 1
-                        
-                        time.sleep(delay * 0.3)
-                
-                # Resumo final com usuários não encontrados
-                log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", "system")
-                log(f"🏁 ENVIO CONCLUÍDO", "success")
-                log(f"📊 Resumo:", "info")
-                log(f"   • Total de mensagens: {total_enviados + total_erros}", "info")
-                log(f"   • Enviadas com sucesso: {total_enviados}", "success")
-                log(f"   • Erros: {total_erros}", "error" if total_erros > 0 else "info")
-                
-                if usuarios_nao_encontrados:
-                    log(f"   • Usuários não encontrados no Slack ({len(usuarios_nao_encontrados)}):", "warning")
-                    for usuario in usuarios_nao_encontrados:
-                        log(f"     - {usuario.title()}", "warning")
-                
-                if arquivos_selecionados:
-                    log(f"   • Arquivos anexados ({len(arquivos_selecionados)}):", "info")
-                    for arquivo in arquivos_selecionados:
-                        log(f"     - {arquivo.name}", "info")
-                
-                log(f"   • Log salvo em: {log_file.name}", "system")
-                
-            except Exception as ex:
-                log(f"❌ Erro inesperado: {str(ex)}", "error")
+                motor.executar(log_file)
             finally:
                 # Reabilitar botão
                 enviar_btn.disabled = False
@@ -650,7 +681,8 @@ def main(page: ft.Page):
         label="Digite sua mensagem",
         multiline=True,
         min_lines=15,
-        hint_text="Olá {{nome}}, como você está?\n\nUse {{nome}} para personalizar a mensagem.",
+        hint_text="Olá {{primeiro_nome}}, como você está?\n\nCampos: {{nome}}, {{primeiro_nome}}, {{titulo}}, {{fuso}}... "
+                  "e colunas das listas. Use {{campo|padrão}} para valor padrão.",
         border_color=COLORS["primary"],
         focused_border_color=COLORS["secondary"],
         expand=True,
@@ -658,24 +690,74 @@ def main(page: ft.Page):
     )
     
     delay_input = ft.Slider(
-        min=1,
+        min=0,
         max=5,
-        divisions=40,
+        divisions=50,
         label="{value}s",
-        value=1.5,
+        value=0,
         active_color=COLORS["primary"],
         inactive_color=COLORS["card_bg"],
         width=300,
     )
     
-    delay_info = ft.Text("Delay entre mensagens: 1.5s", size=12, color=COLORS["text"], opacity=0.7)
+    delay_info = ft.Text("Delay entre mensagens: automático (limites do Slack)", size=12, color=COLORS["text"], opacity=0.7)
     
     def on_delay_change(e):
-        delay_info.value = f"Delay entre mensagens: {delay_input.value:.1f}s"
+        if delay_input.value:
+            delay_info.value = f"Delay entre mensagens: {delay_input.value:.1f}s"
+        else:
+            delay_info.value = "Delay entre mensagens: automático (limites do Slack)"
         page.update()
     
     delay_input.on_change = on_delay_change
     
+    trabalhadores_input = ft.Slider(
+        min=1,
+        max=10,
+        divisions=9,
+        label="{value}",
+        value=4,
+        active_color=COLORS["primary"],
+        inactive_color=COLORS["card_bg"],
+        width=300,
+    )
+    
+    trabalhadores_info = ft.Text("Envios simultâneos: 4", size=12, color=COLORS["text"], opacity=0.7)
+    
+    def on_trabalhadores_change(e):
+        trabalhadores_info.value = f"Envios simultâneos: {int(trabalhadores_input.value)}"
+        page.update()
+    
+    trabalhadores_input.on_change = on_trabalhadores_change
+    
+    anexos_referencia_switch = ft.Switch(
+        label="Upload único dos anexos (compartilhar por link)",
+        value=True,
+        active_color=COLORS["primary"],
+    )
+    
+    reenvio_switch = ft.Switch(
+        label="Permitir reenviar mensagem idêntica a quem já recebeu",
+        value=False,
+        active_color=COLORS["primary"],
+    )
+    
+    inicio_input = ft.TextField(
+        label="Início agendado (opcional)",
+        hint_text=FORMATO_INICIO,
+        border_color=COLORS["primary"],
+        dense=True,
+        width=300,
+    )
+    
+    janela_input = ft.TextField(
+        label="Janela no horário do destinatário (opcional)",
+        hint_text=f"{FORMATO_JANELA}, ex.: 09:00-18:00",
+        border_color=COLORS["primary"],
+        dense=True,
+        width=300,
+    )
+    
     # Área de log
     log_area = ft.ListView(spacing=5, padding=10, auto_scroll=True, height=250)
     
@@ -697,6 +779,14 @@ def main(page: ft.Page):
         on_click=enviar_mensagens,
     )
     
+    retomar_btn = ft.OutlinedButton(
+        content=ft.Row([
+            ft.Text("♻️", size=16),
+            ft.Text("Retomar Campanha"),
+        ]),
+        on_click=retomar_campanha,
+    )
+    
     limpar_log_btn = ft.OutlinedButton(
         content=ft.Row([
             ft.Text("🗑️", size=16),
@@ -705,6 +795,14 @@ def main(page: ft.Page):
         on_click=lambda e: limpar_log(),
     )
     
+    historico_btn = ft.OutlinedButton(
+        content=ft.Row([
+            ft.Text("📜", size=16),
+            ft.Text("Histórico"),
+        ]),
+        on_click=abrir_historico,
+    )
+    
     # Diálogos
     editor_conteudo = ft.TextField(multiline=True, min_lines=20, expand=True)
     editor_titulo = ft.Text(size=16, weight=ft.FontWeight.BOLD)
@@ -724,6 +822,28 @@ def main(page: ft.Page):
         actions_alignment=ft.MainAxisAlignment.END,
     )
     
+    # Visualizador paginado do histórico do log (só a página aberta vira controle)
+    historico_area = ft.ListView(spacing=5, padding=10, expand=True)
+    historico_info = ft.Text(size=12, color=COLORS["text"])
+    historico_anterior_btn = ft.TextButton("⬅️ Anteriores", on_click=lambda e: mostrar_pagina_historico(pagina_historico - 1))
+    historico_proxima_btn = ft.TextButton("Próximas ➡️", on_click=lambda e: mostrar_pagina_historico(pagina_historico + 1))
+    
+    historico_dialog = ft.AlertDialog(
+        modal=True,
+        title=ft.Text("📜 Histórico do Log", size=16, weight=ft.FontWeight.BOLD),
+        content=ft.Container(
+            content=ft.Column([historico_info, historico_area]),
+            width=700,
+            height=450,
+        ),
+        actions=[
+            historico_anterior_btn,
+            historico_proxima_btn,
+            ft.TextButton("Fechar", on_click=lambda e: (setattr(historico_dialog, 'open', False), page.update())),
+        ],
+        actions_alignment=ft.MainAxisAlignment.END,
+    )
+    
     # =========================
     # LAYOUT PRINCIPAL
     # =========================
@@ -789,6 +909,12 @@ def main(page: ft.Page):
                                     ft.Text("⚙️ CONFIGURAÇÕES", size=16, weight=ft.FontWeight.BOLD),
                                     delay_info,
                                     ft.Row([delay_input], width=300),
+                                    trabalhadores_info,
+                                    ft.Row([trabalhadores_input], width=300),
+                                    anexos_referencia_switch,
+                                    reenvio_switch,
+                                    inicio_input,
+                                    janela_input,
                                     
                                     ft.Divider(height=20),
                                     
@@ -797,7 +923,9 @@ def main(page: ft.Page):
                                         enviar_btn,
                                         ft.Container(height=10),
                                         ft.Row([
+                                            retomar_btn,
                                             limpar_log_btn,
+                                            historico_btn,
                                             ft.Container(expand=True),
                                             ft.Text(f"v1.4.0 | @devtiagoabreu", size=10, color=COLORS["text"], opacity=0.5),
                                         ]),
@@ -901,6 +1029,26 @@ def main(page: ft.Page):
     # Carregar dados iniciais
     carregar_listas()
     atualizar_lista_arquivos()
+    
+    # Listas e mídia acompanham o disco sem precisar do botão Atualizar
+    observador = DirectoryWatcher([LISTAS_DIR, IMAGENS_DIR, ARQUIVOS_DIR], ao_mudar_diretorio)
+    if observador.iniciar():
+        log("👀 Observando listas/, imagens/ e arquivos/", "system")
+    else:
+        log("watchfiles não instalado: use 🔄 Atualizar após mudar arquivos", "warning")
+    
+    # Trazer para o diário os CSVs de campanhas antigas
+    importadas = journal.importar_logs(LOG_DIR)
+    if importadas:
+        log(f"🗄️ {importadas} log(s) CSV antigo(s) importado(s) para o diário", "system")
+    
+    interrompida = journal.campanha_interrompida()
+    if interrompida:
+        log(f"♻️ Campanha #{interrompida['id']} ({interrompida['criada_em']}) não terminou. Use \"Retomar Campanha\".", "warning")
+
+    # Manter diretório do Slack aquecido enquanto não há envio em andamento
+    if diretorio:
+        diretorio.iniciar_atualizacao(intervalo=60, ocioso=lambda: not enviar_btn.disabled)
 
 # =========================
 # INICIAR APLICATIVO
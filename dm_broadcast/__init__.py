@@ -0,0 +1 @@
+"""Núcleo de envio do Slack DM Manager Pro (diretório, cache e despacho)"""
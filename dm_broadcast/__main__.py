@@ -0,0 +1,7 @@
+import sys
+
+from dm_broadcast.cli import main
+
+# Guardado: os processos de cada workspace reimportam este módulo
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import hmac
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    from fastapi import Depends, FastAPI, Header, HTTPException
+    from pydantic import BaseModel
+except ImportError:  # a API é opcional: a interface e a CLI não precisam dela
+    FastAPI = None
+
+from dm_broadcast.campaign import CampaignError, preparar_campanha
+
+# =========================
+# API HTTP DE CAMPANHAS
+# =========================
+# Só arquivos destas pastas (dentro de --base-dir) podem ser anexados pela API
+PASTAS_ANEXOS = ("imagens", "arquivos")
+
+
+def validar_anexos(anexos, base_dir="."):
+    """Caminhos absolutos dos anexos; CampaignError se algum sair de imagens/ ou arquivos/
+
+    Caminhos relativos partem de `base_dir`. Links simbólicos e `..` são
+    resolvidos antes da checagem, então não dá para escapar das pastas.
+    """
+    base = Path(base_dir).resolve()
+    pastas = [base / pasta for pasta in PASTAS_ANEXOS]
+    caminhos = []
+    for anexo in anexos:
+        caminho = (base / anexo).resolve()
+        if not any(pasta in caminho.parents for pasta in pastas):
+            raise CampaignError(f"Anexo fora de {' ou '.join(p + '/' for p in PASTAS_ANEXOS)}: {anexo}")
+        if not caminho.is_file():
+            raise CampaignError(f"Anexo não encontrado: {anexo}")
+        caminhos.append(caminho)
+    return caminhos
+
+
+def criar_app(fila, catalogo, chave_api=None, base_dir="."):
+    """Aplicação FastAPI que recebe campanhas e as coloca na fila
+
+    Se `chave_api` for definida, toda requisição precisa do cabeçalho
+    `Authorization: Bearer <chave>`. Anexos só podem vir de imagens/ e
+    arquivos/ dentro de `base_dir`.
+    """
+    if FastAPI is None:
+        raise RuntimeError("fastapi não está instalado (pip install -r requirements.txt)")
+
+    class PedidoCampanha(BaseModel):
+        lists: List[str]
+        message: str
+        attachments: List[str] = []
+        workers: int = 4
+        delay: float = 0.0
+        by_reference: bool = False
+        allow_resend: bool = False
+        dry_run: bool = False
+        priority: int = 0  # maior = mais urgente
+        start_at: Optional[str] = None  # ISO; sem fuso = horário do servidor
+        window: Optional[str] = None  # "09:00-18:00" no horário local de cada destinatário
+
+    catalogo_lock = threading.Lock()
+
+    def autorizar(authorization: str = Header(default="")):
+        if chave_api and not hmac.compare_digest(authorization, f"Bearer {chave_api}"):
+            raise HTTPException(status_code=401, detail="Chave de API inválida")
+
+    app = FastAPI(title="Slack DM Manager Pro", dependencies=[Depends(autorizar)])
+
+    def buscar(job_id):
+        resumo = fila.resumo(job_id)
+        if resumo is None:
+            raise HTTPException(status_code=404, detail="Campanha não encontrada")
+        return resumo
+
+    @app.get("/health")
+    def saude():
+        jobs = fila.jobs()
+        return {
+            "status": "ok",
+            "fila": sum(1 for j in jobs if j["estado"] == "NA_FILA"),
+            "executando": sum(1 for j in jobs if j["estado"] == "EXECUTANDO"),
+            "tokens": fila.conexao[0].saude() if fila.conexao else [],
+        }
+
+    @app.post("/campaigns", status_code=202)
+    def criar(pedido: PedidoCampanha):
+        with catalogo_lock:
+            catalogo.atualizar()
+            try:
+                anexos = validar_anexos(pedido.attachments, base_dir)
+                parametros, lista_de_origem = preparar_campanha(
+                    catalogo, pedido.lists, pedido.message, anexos, delay=pedido.delay,
+                    trabalhadores=pedido.workers, por_referencia=pedido.by_reference,
+                    permitir_reenvio=pedido.allow_resend, inicio=pedido.start_at, janela=pedido.window,
+                )
+            except CampaignError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        return fila.enfileirar(parametros, lista_de_origem, simulacao=pedido.dry_run, prioridade=pedido.priority)
+
+    @app.get("/campaigns")
+    def listar(limit: int = 100):
+        return fila.jobs(limit)
+
+    @app.get("/campaigns/{job_id}")
+    def status(job_id: int):
+        return buscar(job_id)
+
+    @app.post("/campaigns/{job_id}/cancel")
+    def cancelar(job_id: int):
+        job = buscar(job_id)
+        if not fila.cancelar(job_id):
+            raise HTTPException(status_code=409, detail=f"Campanha já terminou ({job['estado']})")
+        return buscar(job_id)
+
+    return app
@@ -0,0 +1,178 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from pathlib import Path
+
+# =========================
+# ANEXOS DA CAMPANHA
+# =========================
+# Acima deste tamanho o snapshot vai para um arquivo temporário mapeado em memória
+LIMITE_MEMORIA = 8 * 1024 * 1024
+TAMANHO_BLOCO = 1024 * 1024
+
+
+class AttachmentSnapshot:
+    """Cópia imutável de um anexo tirada no início da campanha, com SHA-256"""
+
+    def __init__(self, caminho, limite_memoria=LIMITE_MEMORIA):
+        self.caminho = Path(caminho)
+        self.nome = self.caminho.name
+        self._dados = None
+        self._mmap = None
+        self._tmp = None
+
+        digest = hashlib.sha256()
+        if self.caminho.stat().st_size <= limite_memoria:
+            with open(self.caminho, "rb") as f:
+                self._dados = f.read()
+            digest.update(self._dados)
+        else:
+            # Copia para um temporário enquanto calcula o hash: edições no
+            # original durante a campanha não alteram o que é enviado
+            fd, self._tmp = tempfile.mkstemp(prefix="anexo_", suffix=self.caminho.suffix)
+            with os.fdopen(fd, "wb") as destino, open(self.caminho, "rb") as origem:
+                for bloco in iter(lambda: origem.read(TAMANHO_BLOCO), b""):
+                    digest.update(bloco)
+                    destino.write(bloco)
+            with open(self._tmp, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.sha256 = digest.hexdigest()
+        self.tamanho = len(self.view())
+
+    def view(self):
+        """memoryview dos bytes do snapshot (fatias não copiam dados)"""
+        if self._dados is not None:
+            return memoryview(self._dados)
+        return memoryview(self._mmap)
+
+    def arquivo(self):
+        """Bytes do snapshot para o files_upload_v2
+
+        O SDK lê o arquivo inteiro para a memória de qualquer forma; no
+        snapshot mapeado a cópia acontece aqui, só durante o upload.
+        """
+        if self._dados is not None:
+            return self._dados
+        return bytes(self.view())
+
+    def fechar(self):
+        """Libera o mmap e apaga o temporário, se houver"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._tmp:
+            try:
+                os.remove(self._tmp)
+            except OSError:
+                pass
+            self._tmp = None
+
+
+class AttachmentDigest:
+    """Nome e SHA-256 de um anexo, lido em blocos e sem tirar snapshot"""
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self.nome = self.caminho.name
+        digest = hashlib.sha256()
+        with open(self.caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+                digest.update(bloco)
+        self.sha256 = digest.hexdigest()
+
+
+class AttachmentManager:
+    """Tira o snapshot de todos os anexos selecionados no início da campanha"""
+
+    def __init__(self, arquivos, limite_memoria=LIMITE_MEMORIA):
+        self.snapshots = []
+        self.ausentes = []
+        for arquivo in arquivos:
+            arquivo = Path(arquivo)
+            if arquivo.exists():
+                self.snapshots.append(AttachmentSnapshot(arquivo, limite_memoria))
+            else:
+                self.ausentes.append(arquivo)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def __iter__(self):
+        return iter(self.snapshots)
+
+    def nomes(self):
+        """Nomes dos anexos para o log CSV"""
+        return ", ".join(s.nome for s in self.snapshots)
+
+    def hashes(self):
+        """SHA-256 dos anexos, na mesma ordem dos nomes, para o log CSV"""
+        return ", ".join(s.sha256 for s in self.snapshots)
+
+    def fechar(self):
+        for snapshot in self.snapshots:
+            snapshot.fechar()
+
+
+def enviar_arquivos_em_lote(client, canal_id, anexos, texto):
+    """Envia vários arquivos e o texto como uma única mensagem (files_upload_v2 com file_uploads)"""
+    uploads = [
+        {"file": s.arquivo(), "filename": s.nome, "title": s.nome}
+        for s in anexos
+    ]
+    if not uploads:
+        return client.chat_postMessage(channel=canal_id, text=texto)
+    return client.files_upload_v2(
+        channel=canal_id,
+        file_uploads=uploads,
+        initial_comment=texto,
+    )
+
+
+class CampaignAttachments:
+    """Sobe cada anexo uma única vez por campanha e compartilha por permalink
+
+    Sem canal de staging o arquivo fica privado ao bot; o Slack o compartilha
+    em cada DM quando o permalink aparece na mensagem enviada pelo mesmo bot.
+    """
+
+    def __init__(self, client, anexos, canal_staging=None):
+        self.client = client
+        self.anexos = list(anexos)
+        self.canal_staging = canal_staging
+        self.enviados = []  # (nome, permalink)
+
+    def preparar(self):
+        """Faz o upload de todos os anexos (uma chamada por arquivo, uma vez)"""
+        self.enviados = []
+        for snapshot in self.anexos:
+            kwargs = {"file": snapshot.arquivo(), "filename": snapshot.nome, "title": snapshot.nome}
+            if self.canal_staging:
+                kwargs["channel"] = self.canal_staging
+            resposta = self.client.files_upload_v2(**kwargs)
+            dados = resposta.get("file") or (resposta.get("files") or [{}])[0]
+            self.enviados.append((snapshot.nome, dados["permalink"]))
+        return self.enviados
+
+    def mensagem(self, texto):
+        """Texto da DM com os permalinks dos anexos já enviados"""
+        if not self.enviados:
+            return texto
+        links = "\n".join(f"📎 <{permalink}|{nome}>" for nome, permalink in self.enviados)
+        return f"{texto}\n\n{links}"
+
+    def enviar(self, canal_id, texto):
+        """Envia a DM referenciando os anexos: uma única chamada por destinatário"""
+        return self.client.chat_postMessage(
+            channel=canal_id,
+            text=self.mensagem(texto),
+            unfurl_links=True,
+            unfurl_media=True,
+        )
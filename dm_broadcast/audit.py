@@ -0,0 +1,100 @@
+import abc
+import queue
+import threading
+import time
+
+# =========================
+# GRAVAÇÃO DE LOGS EM LOTE
+# =========================
+CABECALHO_CSV = ['Data', 'Hora', 'Usuario', 'Status', 'Lista', 'Mensagem', 'Arquivos', 'SHA256']
+# Backoff entre tentativas de gravar um lote (ex.: SQLite ocupado por outro processo)
+ESPERA_BASE = 0.2
+ESPERA_MAX = 5.0
+
+_FIM = object()
+
+
+class BatchWriter(abc.ABC):
+    """Grava linhas em lotes numa thread própria, sem bloquear quem produz
+
+    O lote é descarregado ao atingir `max_linhas`, a cada `intervalo`
+    segundos e no fechamento. Se a gravação falhar, o mesmo lote é
+    tentado de novo com backoff; depois de `max_tentativas` falhas o
+    erro fica em `erro` e vai para `ao_falhar(erro, linhas)`.
+    """
+
+    def __init__(self, max_linhas=200, intervalo=1.0, max_tentativas=5, ao_falhar=None):
+        self.max_linhas = max_linhas
+        self.intervalo = intervalo
+        self.max_tentativas = max(1, max_tentativas)
+        self.ao_falhar = ao_falhar
+        self.erro = None
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def escrever(self, linha):
+        """Enfileira uma linha (retorna imediatamente)"""
+        self._fila.put(linha)
+
+    def fechar(self):
+        """Descarrega o que falta e encerra a thread"""
+        if self._thread.is_alive():
+            self._fila.put(_FIM)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _loop(self):
+        lote = []
+        falhas = 0
+        fim = False
+        limite = time.monotonic() + self.intervalo
+        while True:
+            if not fim:
+                try:
+                    # Com um lote pendente de nova tentativa, não espera o intervalo
+                    espera = 0.0 if falhas else max(0.0, limite - time.monotonic())
+                    item = self._fila.get(timeout=espera)
+                except queue.Empty:
+                    item = None
+                fim = item is _FIM
+                if item is not None and not fim:
+                    lote.append(item)
+
+            if lote and (fim or falhas or len(lote) >= self.max_linhas or time.monotonic() >= limite):
+                try:
+                    self._gravar(lote)
+                    lote, falhas = [], 0
+                except Exception as e:
+                    falhas += 1
+                    if falhas < self.max_tentativas:
+                        # Mantém o lote e tenta de novo
+                        time.sleep(min(ESPERA_MAX, ESPERA_BASE * 2 ** (falhas - 1)))
+                    else:
+                        self._falhou(e, lote)
+                        lote, falhas = [], 0
+            if time.monotonic() >= limite:
+                limite = time.monotonic() + self.intervalo
+            if fim and not lote:
+                self._finalizar()
+                return
+
+    def _falhou(self, erro, linhas):
+        """Tentativas esgotadas: guarda o erro e avisa quem usa o writer"""
+        self.erro = erro
+        if self.ao_falhar is not None:
+            self.ao_falhar(erro, linhas)
+        else:
+            print(f"⚠️ Falha ao gravar log ({len(linhas)} linha(s) descartada(s)): {erro}")
+
+    @abc.abstractmethod
+    def _gravar(self, linhas):
+        """Grava um lote; uma exceção faz o lote ser tentado de novo"""
+
+    def _finalizar(self):
+        pass
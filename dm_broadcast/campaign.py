@@ -0,0 +1,606 @@
+import collections
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from slack_sdk.errors import SlackApiError
+
+from dm_broadcast.attachments import AttachmentManager, CampaignAttachments, enviar_arquivos_em_lote
+from dm_broadcast.catalog import EXTENSAO_LISTA
+from dm_broadcast.checkpoint import Checkpoint
+from dm_broadcast.dedupe import DedupeIndex, chave_dedupe
+from dm_broadcast.directory import UserDirectory
+from dm_broadcast.dispatch import Dispatcher, RetryLater
+from dm_broadcast.journal import JournalWriter
+from dm_broadcast.pool import ERROS_TOKEN, TokenPool, TokenPoolError
+from dm_broadcast.ratelimit import ERROS_TRANSITORIOS, com_prioridade, retry_after
+from dm_broadcast.schedule import DeliverySchedule, ScheduleError
+from dm_broadcast.template import CAMPOS_DIRETORIO, Template, campos_membro
+
+# =========================
+# MOTOR DE CAMPANHA (SEM INTERFACE)
+# =========================
+# Espera (s) quando outra campanha está enviando a mesma mensagem para a mesma pessoa
+ESPERA_RESERVA = 5.0
+
+
+class CampaignError(Exception):
+    """Pedido de campanha inválido (lista ausente, mensagem vazia, campo desconhecido)"""
+
+
+def conectar(tokens, cache_dir, ttl=3600):
+    """Pool de tokens (cada um com limitador e cache de DMs) e diretório de usuários"""
+    if isinstance(tokens, str):
+        tokens = [tokens]
+    pool = TokenPool(tokens, cache_dir)
+    diretorio = UserDirectory(pool.principal, Path(cache_dir) / "usuarios.json", ttl=ttl)
+    return pool, diretorio
+
+
+def novo_log_csv(log_dir):
+    """Reserva o CSV de log de uma nova execução (sem colidir com um existente)"""
+    base = f"log_envio_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    caminho = Path(log_dir) / f"{base}.csv"
+    sufixo = 2
+    while True:
+        try:
+            # Criação exclusiva: campanhas simultâneas nunca recebem o mesmo nome
+            open(caminho, "x").close()
+            return caminho
+        except FileExistsError:
+            caminho = Path(log_dir) / f"{base}_{sufixo}.csv"
+            sufixo += 1
+
+
+def log_csv_da_campanha(journal, log_dir, campanha_id=None):
+    """CSV de log de uma execução: o da campanha retomada ou um novo
+
+    Uma retomada reexporta o CSV que a campanha já tinha (com todas as
+    tentativas); um CSV novo deixaria o anterior órfão, e ele voltaria
+    como campanha IMPORTADA no próximo importar_logs.
+    """
+    if campanha_id is not None:
+        campanha = journal.campanha(campanha_id)
+        if campanha and campanha["log_csv"]:
+            return Path(log_dir) / campanha["log_csv"]
+    return novo_log_csv(log_dir)
+
+
+def checkpoint_campanha(checkpoint_dir, campanha_id):
+    """Checkpoint em disco de uma campanha"""
+    return Checkpoint(Path(checkpoint_dir) / f"campanha_{campanha_id}.ckpt")
+
+
+def destinatarios_das_listas(catalogo, listas):
+    """alvo -> lista de origem (a primeira lista em que o nome aparece)"""
+    lista_de_origem = {}
+    for lista in listas:
+        for nome in catalogo.nomes(lista):
+            lista_de_origem.setdefault(nome, lista)
+    return lista_de_origem
+
+
+def campos_disponiveis(catalogo, listas):
+    """Campos de template que o diretório ou as listas sabem preencher"""
+    disponiveis = set(CAMPOS_DIRETORIO)
+    for lista in listas:
+        disponiveis.update(catalogo.colunas(lista))
+    return disponiveis
+
+
+def nome_lista(lista):
+    """Nome do arquivo de lista, aceitando com ou sem .txt"""
+    nome = Path(lista).name
+    return nome if nome.endswith(EXTENSAO_LISTA) else nome + EXTENSAO_LISTA
+
+
+def preparar_campanha(catalogo, listas, mensagem, arquivos=(), delay=0.0, trabalhadores=4,
+                      por_referencia=False, permitir_reenvio=False, prioridade=0, inicio=None, janela=None):
+    """Valida um pedido de campanha e devolve (parametros, lista_de_origem)"""
+    listas = [nome_lista(l) for l in listas]
+    if not listas:
+        raise CampaignError("Selecione pelo menos uma lista")
+    ausentes = [l for l in listas if l not in catalogo]
+    if ausentes:
+        raise CampaignError(f"Lista(s) não encontrada(s): {', '.join(ausentes)}")
+    if not (mensagem or "").strip():
+        raise CampaignError("Mensagem vazia")
+    desconhecidos = Template(mensagem).desconhecidos(campos_disponiveis(catalogo, listas))
+    if desconhecidos:
+        raise CampaignError(f"Campo(s) desconhecido(s) na mensagem: {', '.join(desconhecidos)}")
+    try:
+        agenda = DeliverySchedule(inicio, janela)
+    except ScheduleError as e:
+        raise CampaignError(str(e)) from None
+
+    parametros = {
+        "listas": listas,
+        "mensagem": mensagem,
+        "arquivos": [str(Path(a)) for a in arquivos],
+        "delay": float(delay),
+        "trabalhadores": int(trabalhadores),
+        "por_referencia": bool(por_referencia),
+        "permitir_reenvio": bool(permitir_reenvio),
+        "prioridade": int(prioridade),
+        **agenda.parametros(),
+    }
+    return parametros, destinatarios_das_listas(catalogo, listas)
+
+
+def pendentes_da_campanha(journal, checkpoint_dir, campanha_id):
+    """(pendentes alvo -> lista, concluidos) de uma campanha já iniciada"""
+    concluidos = checkpoint_campanha(checkpoint_dir, campanha_id).concluidos()
+    # Campanhas multi-workspace têm um checkpoint por workspace em subpastas
+    pastas = Path(checkpoint_dir).iterdir() if Path(checkpoint_dir).is_dir() else ()
+    for pasta in pastas:
+        if pasta.is_dir():
+            concluidos |= checkpoint_campanha(pasta, campanha_id).concluidos()
+    return dict(journal.pendentes(campanha_id, concluidos)), concluidos
+
+
+def campanha_para_retomar(journal, checkpoint_dir):
+    """(campanha, parametros, pendentes, concluidos) da última campanha interrompida, ou None"""
+    campanha = journal.campanha_interrompida()
+    if not campanha:
+        return None
+    pendentes, concluidos = pendentes_da_campanha(journal, checkpoint_dir, campanha["id"])
+    return campanha, json.loads(campanha["parametros"]), pendentes, concluidos
+
+
+def _log_console(msg, tipo="info"):
+    print(msg, flush=True)
+
+
+class CampaignRunner:
+    """Executa uma campanha do início ao fim, usado pela interface e pela CLI
+
+    `parametros` é o mesmo dicionário guardado no diário para retomadas
+    (listas, mensagem, arquivos, delay, trabalhadores, por_referencia,
+    permitir_reenvio e, opcionalmente, prioridade, inicio e janela). Sem `pool` a campanha
+    roda em modo de simulação. Todo o retorno ao usuário passa por
+    `log(msg, tipo)`; `ao_iniciar(campanha_id)` é chamado assim que a
+    campanha existe no diário. Com `parcial=True` o runner é só uma parte
+    (um workspace) de uma campanha que já existe no diário: quem coordena
+    as partes exporta o CSV, finaliza a campanha e mostra o resumo;
+    `anexos_sha256` é o SHA-256 dos anexos calculado por quem coordena, e
+    a parte não envia se o seu snapshot não bater com ele.
+    """
+
+    def __init__(self, journal, parametros, lista_de_origem, checkpoint_dir, pool=None,
+                 diretorio=None, campos_lista=None, canal_anexos=None,
+                 log=None, campanha_id=None, ao_iniciar=None, parcial=False, anexos_sha256=None):
+        self.journal = journal
+        self.parametros = parametros
+        self.lista_de_origem = lista_de_origem
+        self.checkpoint_dir = checkpoint_dir
+        self.pool = pool
+        self.diretorio = diretorio
+        self.campos_lista = campos_lista or (lambda lista, alvo: {})
+        self.canal_anexos = canal_anexos
+        self.log = log or _log_console
+        self.campanha_id = campanha_id
+        self.ao_iniciar = ao_iniciar
+        self.parcial = parcial
+        self.anexos_sha256 = anexos_sha256
+        self.totais = {"enviados": 0, "erros": 0, "duplicados": 0}
+        self.nao_encontrados = []
+        self.concluida = False
+        self._totais_lock = threading.Lock()
+        self._cancelado = threading.Event()
+        self._dispatcher = None
+
+    def cancelar(self):
+        """Para de despachar; a campanha fica INTERROMPIDA e pode ser retomada"""
+        self._cancelado.set()
+        if self._dispatcher is not None:
+            self._dispatcher.cancelar()
+
+    def _contar(self, chave):
+        with self._totais_lock:
+            self.totais[chave] += 1
+
+    def executar(self, log_csv):
+        """Roda a campanha e exporta o CSV para `log_csv`; retorna True se concluiu"""
+        if self.campanha_id is not None and not self.parcial and not self.journal.assumir_campanha(self.campanha_id):
+            self.log(f"❌ Campanha #{self.campanha_id} já está em andamento em outro processo", "error")
+            return False
+        # Campanhas urgentes passam na frente no limitador compartilhado
+        with com_prioridade(self.parametros.get("prioridade", 0)):
+            self._executar(log_csv)
+        # Vale o estado final: uma falha do diário no fechamento desfaz a conclusão
+        return self.concluida
+
+    def _diario_falhou(self, erro, linhas):
+        """O diário não aceitou um lote: a campanha para em vez de seguir sem registro"""
+        self.log(f"❌ Falha ao gravar {len(linhas)} tentativa(s) no diário: {erro}; campanha interrompida", "error")
+        self.cancelar()
+
+    def _executar(self, log_csv):
+        log = self.log
+        parametros = self.parametros
+        lista_de_origem = self.lista_de_origem
+        pool = self.pool
+        selecionadas = parametros["listas"]
+        mensagem = parametros["mensagem"]
+        delay = parametros["delay"]
+        trabalhadores = parametros["trabalhadores"]
+        por_referencia = parametros["por_referencia"]
+        permitir_reenvio = parametros.get("permitir_reenvio", False)
+        # Template compilado uma vez; por destinatário só resta o join
+        template = Template(mensagem)
+
+        anexos_campanha = None
+        checkpoint = None
+        # Tentativas vão para o diário em lotes, por uma thread própria
+        diario = JournalWriter(self.journal, ao_falhar=self._diario_falhou)
+        try:
+            log(f"🚀 Iniciando envio para {len(selecionadas)} lista(s)...", "success")
+            log(f"⏱️  Delay entre mensagens: {delay}s | Envios simultâneos: {trabalhadores}", "info")
+
+            # Snapshot dos anexos: bytes fixos (e SHA-256) durante toda a campanha
+            anexos_campanha = AttachmentManager([Path(a) for a in parametros["arquivos"]])
+            for ausente in anexos_campanha.ausentes:
+                log(f"⚠️ Arquivo não encontrado, ignorado: {ausente.name}", "warning")
+            if self.anexos_sha256 is not None and anexos_campanha.hashes() != self.anexos_sha256:
+                # As partes de uma campanha precisam enviar exatamente os mesmos bytes
+                log("❌ Os anexos mudaram depois do início da campanha; envio não iniciado", "error")
+                return False
+            if anexos_campanha:
+                log(f"📎 Enviando {len(anexos_campanha)} arquivo(s) anexado(s)", "info")
+            log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", "system")
+
+            usuarios_nao_encontrados = []
+            # Ordem das listas (e das linhas de cada lista): quem vem primeiro recebe primeiro
+            usuarios_para_enviar = list(lista_de_origem)
+
+            def valores_template(alvo, membro):
+                """Campos do diretório mais as colunas extras da lista de origem"""
+                valores = campos_membro(alvo, membro)
+                if not pool:
+                    # Simulação: campos do Slack que não temos aparecem como <campo>
+                    valores = {campo: valor or f"<{campo}>" for campo, valor in valores.items()}
+                valores.update(self.campos_lista(lista_de_origem.get(alvo), alvo))
+                return valores
+
+            # Destinatários são resolvidos antes de a campanha começar
+            ambiguos = {}
+            if pool:
+                try:
+                    encontrados, usuarios_nao_encontrados, ambiguos = self.diretorio.indice().resolver(
+                        usuarios_para_enviar
+                    )
+                except SlackApiError as e:
+                    log(f"❌ Erro geral do Slack: {e.response['error']}", "error")
+                    return False
+            else:
+                encontrados = [(alvo, {"id": "", "real_name": alvo.title()}) for alvo in usuarios_para_enviar]
+            valores = {alvo: valores_template(alvo, user) for alvo, user in encontrados}
+            self.nao_encontrados = usuarios_nao_encontrados
+
+            # Campo obrigatório sem valor barra a campanha antes do primeiro envio
+            problemas = template.validar(valores.items())
+            if problemas:
+                log(f"❌ Campanha não iniciada: {len(problemas)} destinatário(s) sem valor para campos obrigatórios", "error")
+                for alvo, campos in list(problemas.items())[:10]:
+                    log(f"   - {alvo}: {', '.join(campos)}", "error")
+                if len(problemas) > 10:
+                    log(f"   ... e mais {len(problemas) - 10}", "error")
+                log("   Use {{campo|padrão}} para definir um valor padrão", "info")
+                return False
+
+            if self.campanha_id is None:
+                self.campanha_id = self.journal.criar_campanha(
+                    listas=", ".join(selecionadas),
+                    mensagem=mensagem,
+                    arquivos=anexos_campanha.nomes(),
+                    sha256=anexos_campanha.hashes(),
+                    parametros=parametros,
+                )
+                self.journal.registrar_destinatarios(self.campanha_id, list(lista_de_origem.items()))
+            elif (self.anexos_sha256 is None
+                  and self.journal.campanha(self.campanha_id)["sha256"] != anexos_campanha.hashes()):
+                log("⚠️ Os anexos mudaram desde o início da campanha", "warning")
+            campanha_id = self.campanha_id
+            if self.ao_iniciar:
+                self.ao_iniciar(campanha_id)
+
+            # Cada envio bem-sucedido vai direto para o checkpoint em disco
+            checkpoint = checkpoint_campanha(self.checkpoint_dir, campanha_id)
+
+            def registrar(alvo, status, usuario="", user_id=None, texto="", erro="", chave=None):
+                """Enfileira uma tentativa no diário de entregas"""
+                if status in ("ENVIADO", "SIMULADO"):
+                    checkpoint.registrar(alvo)
+                diario.escrever({
+                    "campanha_id": campanha_id,
+                    "alvo": alvo,
+                    "usuario": usuario,
+                    "user_id": user_id,
+                    "lista": lista_de_origem.get(alvo, ""),
+                    "status": status,
+                    "erro": erro,
+                    "mensagem": texto[:50] + "..." if len(texto) > 50 else texto,
+                    "chave": chave,
+                })
+
+            log(f"📨 Preparando {len(usuarios_para_enviar)} mensagens...", "info")
+
+            agenda = DeliverySchedule.dos_parametros(parametros)
+            if agenda:
+                self._mostrar_agenda(agenda, encontrados)
+
+            esvaziou = True
+            if pool:
+                esvaziou = self._enviar(encontrados, valores, template, anexos_campanha, registrar,
+                             usuarios_nao_encontrados, ambiguos, por_referencia, permitir_reenvio, delay,
+                             trabalhadores, agenda)
+            else:
+                # Modo de teste (simulação)
+                log("🔄 Modo de teste ativado (simulando envios)...", "warning")
+                if agenda:
+                    log("   A simulação não aguarda o agendamento", "warning")
+
+                for i, (usuario, _) in enumerate(encontrados, 1):
+                    if self._cancelado.is_set():
+                        break
+                    texto = template.renderizar(valores[usuario])
+
+                    # Log de simulação
+                    registrar(usuario, "SIMULADO", usuario.title(), texto=texto)
+
+                    log_msg = f"✅ [{i}/{len(encontrados)}] SIMULAÇÃO para {usuario.title()}"
+                    if anexos_campanha:
+                        log_msg += f" com {len(anexos_campanha)} arquivo(s)"
+                    log(log_msg, "success")
+                    self._contar("enviados")
+
+                    time.sleep(delay * 0.3)
+
+            if self._cancelado.is_set():
+                log("⏹️ Envio cancelado; use a retomada para continuar depois", "warning")
+                return False
+            if not esvaziou:
+                log("⚠️ O envio parou antes do fim; use a retomada para continuar", "warning")
+                return False
+
+            if not self.parcial:
+                self._resumo(usuarios_nao_encontrados, anexos_campanha, log_csv)
+            self.concluida = True
+            return True
+
+        except Exception as ex:
+            log(f"❌ Erro inesperado: {str(ex)}", "error")
+            return False
+        finally:
+            diario.fechar()
+            if diario.erro is not None:
+                # Tentativas perdidas: o checkpoint fica e a retomada não reenvia para quem já recebeu
+                self.concluida = False
+            # Uma parte (workspace) só grava no diário; exportar e finalizar cabe a quem coordena
+            if not self.parcial and self.campanha_id is not None:
+                # CSV da campanha é gerado a partir do diário
+                self.journal.exportar_csv(self.campanha_id, log_csv)
+                self.journal.finalizar_campanha(self.campanha_id, "CONCLUIDA" if self.concluida else "INTERROMPIDA")
+            elif not self.parcial and Path(log_csv).exists() and not Path(log_csv).stat().st_size:
+                # Campanha nem começou: não deixa o CSV reservado vazio para trás
+                Path(log_csv).unlink()
+            if checkpoint is not None:
+                if self.concluida:
+                    checkpoint.remover()
+                else:
+                    checkpoint.fechar()
+            if anexos_campanha is not None:
+                anexos_campanha.fechar()
+
+    def _enviar(self, encontrados, valores, template, anexos_campanha, registrar, usuarios_nao_encontrados,
+                ambiguos, por_referencia, permitir_reenvio, delay, trabalhadores, agenda):
+        """Modo real: despacho concorrente pelos limites da API do Slack; True se a fila esvaziou"""
+        log = self.log
+        pool = self.pool
+        mensagem = template.texto
+        por_token = collections.Counter()
+        try:
+            for nome in usuarios_nao_encontrados:
+                registrar(nome, "NAO_ENCONTRADO")
+
+            # Nomes que batem com mais de um membro não recebem envio
+            for nome, membros in ambiguos.items():
+                candidatos = ", ".join(
+                    f"{m['real_name'] or m['display_name']} ({m['id']})" for m in membros
+                )
+                log(f"⚠️ Nome ambíguo '{nome}': {candidatos}", "warning")
+                registrar(nome, "AMBIGUO", erro=candidatos)
+
+            if len(pool) > 1:
+                log(f"🔑 {len(pool.ativos())} token(s) ativos: envios divididos entre eles "
+                    f"({trabalhadores} simultâneos por token)", "info")
+
+            # Anexos por referência: upload único antes do primeiro envio (um por token,
+            # já que o link só abre o arquivo na DM do mesmo bot)
+            anexos = {}
+            if anexos_campanha and por_referencia:
+                for slot in pool.ativos():
+                    try:
+                        anexos[slot.indice] = CampaignAttachments(slot.client, anexos_campanha, self.canal_anexos)
+                        anexos[slot.indice].preparar()
+                    except SlackApiError as e:
+                        erro = e.response.get("error")
+                        if erro not in ERROS_TOKEN:
+                            raise
+                        anexos.pop(slot.indice)
+                        pool.desativar(slot, erro)
+                        log(f"🔌 {slot.nome} desativado ({erro}); seguindo com os demais tokens", "warning")
+                log(f"📤 {len(anexos_campanha)} anexo(s) enviado(s) uma única vez para a campanha", "info")
+
+            def entregar(slot, canal_id, texto):
+                """Envia a mensagem (e os anexos, se houver) para um canal de DM"""
+                if slot.indice in anexos:
+                    anexos[slot.indice].enviar(canal_id, texto)
+                elif anexos_campanha:
+                    # Todos os arquivos e o texto em uma única chamada
+                    enviar_arquivos_em_lote(slot.client, canal_id, anexos_campanha, texto)
+                else:
+                    # Sem arquivos, apenas mensagem
+                    slot.client.chat_postMessage(channel=canal_id, text=texto)
+
+            # Chaves de envios anteriores: checagem em memória antes de cada DM
+            dedupe = DedupeIndex(
+                self.journal.chaves_entregues(),
+                total=self.journal.total_chaves_entregues(),
+                confirmar=self.journal.chave_entregue,
+            )
+
+            prioridade = self.parametros.get("prioridade", 0)
+
+            def enviar_um(item):
+                """Envia para um destinatário (executado pelas threads do despacho)"""
+                with com_prioridade(prioridade):
+                    enviar(item)
+
+            def enviar(item):
+                alvo, user = item
+                nome_para_busca = user["real_name"] or user["display_name"] or alvo
+
+                # Personalizar mensagem
+                texto = template.renderizar(valores[alvo])
+
+                # Mesma mensagem e anexos para o mesmo usuário não saem duas vezes
+                chave = chave_dedupe(mensagem, user["id"], texto, anexos_campanha.hashes())
+                reserva = None
+                if not permitir_reenvio:
+                    # A reserva no diário vale também entre campanhas simultâneas (fila da API)
+                    reserva = "entregue"
+                    if not dedupe.contem(chave):
+                        reserva = self.journal.reservar_chave(chave, self.campanha_id)
+                    if reserva == "entregue":
+                        log(f"⏭️ {nome_para_busca} já recebeu esta mensagem, ignorado", "info")
+                        registrar(alvo, "DUPLICADO", nome_para_busca, user["id"], texto, chave=chave)
+                        dedupe.adicionar(chave)
+                        self._contar("duplicados")
+                        return
+                    if reserva == "ocupada":
+                        raise RetryLater(ESPERA_RESERVA, erro="outra campanha está enviando a mesma mensagem")
+
+                def liberar():
+                    if reserva == "reservada":
+                        self.journal.liberar_chave(chave, self.campanha_id)
+
+                try:
+                    slot = pool.escolher(user["id"])
+                except TokenPoolError as e:
+                    liberar()
+                    log(f"❌ {e}; campanha interrompida", "error")
+                    self.cancelar()
+                    return
+
+                try:
+                    # Canal de DM vem do cache do token; conversations_open só na primeira vez
+                    slot.dm_canais.enviar(user["id"], lambda canal_id: entregar(slot, canal_id, texto))
+                    pool.sucesso(slot)
+                    por_token[slot.nome] += 1
+
+                    dedupe.adicionar(chave)
+                    self.journal.confirmar_chave(chave)
+                    registrar(alvo, "ENVIADO", nome_para_busca, user["id"], texto, chave=chave)
+                    self._contar("enviados")
+
+                    log(f"✅ Enviado para {nome_para_busca}", "success")
+
+                    # Pausa opcional por trabalhador (o ritmo vem do limitador)
+                    if delay:
+                        time.sleep(delay)
+
+                except SlackApiError as api_error:
+                    liberar()
+                    error_msg = api_error.response.get('error', 'Erro desconhecido')
+                    if error_msg in ERROS_TOKEN:
+                        # Token revogado ou sem escopo: sai do pool e o destinatário vai para outro
+                        if pool.desativar(slot, error_msg):
+                            log(f"🔌 {slot.nome} desativado ({error_msg}); seguindo com os demais tokens", "warning")
+                        raise RetryLater(0.0, erro=error_msg)
+                    if error_msg in ERROS_TRANSITORIOS:
+                        # Volta para a fila com backoff; o limitador já pausou o método
+                        log(f"⏳ {nome_para_busca}: {error_msg}, nova tentativa em breve", "warning")
+                        espera = retry_after(api_error)
+                        limitado = False
+                        if error_msg == "ratelimited":
+                            pool.limitado(slot, espera)
+                            # Outro token com folga assume o destinatário: só espera o Retry-After
+                            # e reduz a concorrência quando todos os tokens estão limitados
+                            limitado = pool.todos_esfriando()
+                            espera = espera if limitado else 0.0
+                        raise RetryLater(espera, limitado=limitado, erro=error_msg)
+                    log(f"❌ Erro para {nome_para_busca}: {error_msg}", "error")
+                    registrar(alvo, "ERRO", nome_para_busca, user["id"], texto, error_msg)
+                    self._contar("erros")
+
+            def desistir(item, erro):
+                """Chamado quando um destinatário esgota as tentativas"""
+                alvo, user = item
+                nome_para_busca = user["real_name"] or user["display_name"] or alvo
+                log(f"❌ Erro para {nome_para_busca}: {erro.erro} (tentativas esgotadas)", "error")
+                registrar(alvo, "ERRO", nome_para_busca, user["id"], erro=erro.erro)
+                self._contar("erros")
+
+            # A concorrência escolhida vale por token: cada um tem o seu limitador
+            self._dispatcher = Dispatcher(trabalhadores * max(1, len(pool.ativos())))
+            if self._cancelado.is_set():
+                return False
+            return self._dispatcher.executar(
+                encontrados, enviar_um, ao_desistir=desistir,
+                # Cada destinatário espera o início e a janela no seu fuso
+                agenda=(lambda item, instante: agenda.liberacao(item[1], instante)) if agenda else None,
+            )
+
+        except SlackApiError as e:
+            log(f"❌ Erro geral do Slack: {e.response['error']}", "error")
+            return False
+        finally:
+            pool.salvar()
+            if len(pool) > 1:
+                for estado in pool.saude():
+                    log(f"   🔑 {estado['token']}: {por_token[estado['token']]} envio(s), {estado['estado']}"
+                        + (f" ({estado['motivo']})" if estado["motivo"] else ""), "info")
+
+    def _mostrar_agenda(self, agenda, encontrados):
+        """Quando cada grupo de fuso começa a receber"""
+        log = self.log
+        agora = time.time()
+        if agenda.inicio:
+            log(f"🕒 Início agendado para {agenda.inicio.astimezone():%d/%m/%Y %H:%M}", "info")
+        if agenda.janela:
+            abertura, fechamento = agenda.janela
+            log(f"🕒 Janela de entrega: {abertura:%H:%M}-{fechamento:%H:%M} no horário local de cada destinatário", "info")
+        grupos = agenda.grupos((user for _, user in encontrados), agora)
+        for rotulo, quantidade, liberacao in grupos[:10]:
+            quando = "agora" if liberacao <= agora else f"a partir de {datetime.fromtimestamp(liberacao):%d/%m %H:%M}"
+            log(f"   • {rotulo}: {quantidade} destinatário(s) {quando}", "info")
+        if len(grupos) > 10:
+            log(f"   ... e mais {len(grupos) - 10} fuso(s)", "info")
+
+    def _resumo(self, usuarios_nao_encontrados, anexos_campanha, log_csv):
+        """Resumo final com usuários não encontrados"""
+        log = self.log
+        totais = self.totais
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", "system")
+        log(f"🏁 ENVIO CONCLUÍDO", "success")
+        log(f"📊 Resumo:", "info")
+        log(f"   • Total de mensagens: {totais['enviados'] + totais['erros']}", "info")
+        log(f"   • Enviadas com sucesso: {totais['enviados']}", "success")
+        log(f"   • Erros: {totais['erros']}", "error" if totais['erros'] > 0 else "info")
+        if totais["duplicados"]:
+            log(f"   • Ignorados (já haviam recebido): {totais['duplicados']}", "info")
+
+        if usuarios_nao_encontrados:
+            log(f"   • Usuários não encontrados no Slack ({len(usuarios_nao_encontrados)}):", "warning")
+            for usuario in usuarios_nao_encontrados:
+                log(f"     - {usuario.title()}", "warning")
+
+        if anexos_campanha:
+            log(f"   • Arquivos anexados ({len(anexos_campanha)}):", "info")
+            for anexo in anexos_campanha:
+                log(f"     - {anexo.nome} (sha256 {anexo.sha256[:12]}…)", "info")
+
+        log(f"   • Log salvo em: {Path(log_csv).name}", "system")
@@ -0,0 +1,130 @@
+import hashlib
+import os
+from pathlib import Path
+
+from dm_broadcast.index import normalize_name
+
+# =========================
+# CATÁLOGO DE LISTAS
+# =========================
+EXTENSAO_LISTA = ".txt"
+SEPARADOR_COLUNAS = ";"
+
+
+def ler_lista(caminho):
+    """Lê uma lista linha a linha, com colunas extras opcionais
+
+    Cada linha é `nome` ou `nome;valor;valor...`. Se a primeira linha
+    começar com `#`, ela nomeia as colunas (`#nome;empresa;cidade`);
+    sem cabeçalho as extras viram `coluna2`, `coluna3`...
+    Retorna (nomes normalizados, {nome: {coluna: valor}}, colunas, sha256).
+    """
+    h = hashlib.sha256()
+    nomes, campos, colunas = [], {}, []
+    with open(caminho, "rb") as f:
+        for numero, linha in enumerate(f):
+            h.update(linha)
+            texto = linha.decode("utf-8")
+            if numero == 0 and texto.startswith("#"):
+                colunas = [c.strip().lower() for c in texto[1:].split(SEPARADOR_COLUNAS)][1:]
+                continue
+            partes = texto.split(SEPARADOR_COLUNAS)
+            nome = normalize_name(partes[0])
+            if not nome:
+                continue
+            nomes.append(nome)
+            if len(partes) > 1:
+                extras = {}
+                for i, valor in enumerate(partes[1:]):
+                    coluna = colunas[i] if i < len(colunas) and colunas[i] else f"coluna{i + 2}"
+                    extras[coluna] = valor.strip()
+                campos[nome] = extras
+    for extras in campos.values():
+        colunas.extend(c for c in extras if c not in colunas)
+    return nomes, campos, colunas, h.hexdigest()
+
+
+class ListCatalog:
+    """Listas de destinatários em disco com recarga incremental
+
+    Cada arquivo é lembrado por mtime, tamanho e hash do conteúdo; só é
+    relido quando mtime ou tamanho mudam, e só conta como alterado se o
+    hash também mudou.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+        self._entradas = {}  # nome do arquivo -> registro
+
+    def atualizar(self):
+        """Sincroniza com o diretório; retorna (alteradas, removidas, erros)"""
+        alteradas, erros = [], {}
+        vistos = set()
+        with os.scandir(self.diretorio) as it:
+            for item in it:
+                if not item.name.endswith(EXTENSAO_LISTA) or not item.is_file():
+                    continue
+                vistos.add(item.name)
+                try:
+                    if self._reler(item.name, Path(item.path), item.stat()):
+                        alteradas.append(item.name)
+                except (OSError, UnicodeDecodeError) as e:
+                    erros[item.name] = str(e)
+
+        removidas = [nome for nome in self._entradas if nome not in vistos and nome not in erros]
+        for nome in removidas:
+            del self._entradas[nome]
+        return alteradas, removidas, erros
+
+    def atualizar_arquivo(self, nome):
+        """Sincroniza uma única lista; retorna "alterada", "removida" ou None"""
+        if not nome.endswith(EXTENSAO_LISTA):
+            return None
+        caminho = self.diretorio / nome
+        try:
+            st = caminho.stat()
+        except FileNotFoundError:
+            return "removida" if self._entradas.pop(nome, None) else None
+        return "alterada" if self._reler(nome, caminho, st) else None
+
+    def _reler(self, nome, caminho, st):
+        """Relê o arquivo se mtime/tamanho mudaram; indica se o conteúdo mudou"""
+        anterior = self._entradas.get(nome)
+        if anterior and anterior["mtime"] == st.st_mtime_ns and anterior["tamanho"] == st.st_size:
+            return False
+        nomes, campos, colunas, sha256 = ler_lista(caminho)
+        self._entradas[nome] = {
+            "caminho": caminho,
+            "mtime": st.st_mtime_ns,
+            "tamanho": st.st_size,
+            "sha256": sha256,
+            "nomes": nomes,
+            "campos": campos,
+            "colunas": colunas,
+        }
+        # Arquivo tocado mas com o mesmo conteúdo não conta como alteração
+        return not anterior or anterior["sha256"] != sha256
+
+    def nomes(self, lista):
+        """Nomes normalizados de uma lista (vazio se não existir)"""
+        entrada = self._entradas.get(lista)
+        return entrada["nomes"] if entrada else []
+
+    def campos(self, lista, nome):
+        """Colunas extras de um nome na lista (vazio se não houver)"""
+        entrada = self._entradas.get(lista)
+        return entrada["campos"].get(nome, {}) if entrada else {}
+
+    def colunas(self, lista):
+        """Nomes das colunas extras de uma lista"""
+        entrada = self._entradas.get(lista)
+        return entrada["colunas"] if entrada else []
+
+    def caminho(self, lista):
+        return self._entradas[lista]["caminho"]
+
+    def __contains__(self, lista):
+        return lista in self._entradas
+
+    def __len__(self):
+        return len(self._entradas)
@@ -0,0 +1,47 @@
+import threading
+from pathlib import Path
+
+# =========================
+# CHECKPOINT DE CAMPANHA
+# =========================
+class Checkpoint:
+    """Arquivo append-only com um destinatário concluído por linha
+
+    Cada linha é gravada e enviada ao sistema operacional assim que o envio
+    dá certo, então sobrevive ao fechamento da janela ou à morte do processo.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._arquivo = None
+
+    def registrar(self, alvo):
+        """Marca um destinatário como concluído"""
+        with self._lock:
+            if self._arquivo is None:
+                self._arquivo = open(self.caminho, "a", encoding="utf-8")
+            self._arquivo.write(alvo.replace("\n", " ") + "\n")
+            self._arquivo.flush()
+
+    def concluidos(self):
+        """Conjunto de destinatários já concluídos"""
+        if not self.caminho.exists():
+            return set()
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            return {linha.rstrip("\n") for linha in f if linha.strip()}
+
+    def fechar(self):
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+
+    def remover(self):
+        """Apaga o checkpoint de uma campanha concluída"""
+        self.fechar()
+        try:
+            self.caminho.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,205 @@
+import argparse
+import ipaddress
+import os
+import signal
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from dm_broadcast.campaign import (
+    CampaignError, CampaignRunner, campanha_para_retomar, conectar, log_csv_da_campanha,
+    preparar_campanha,
+)
+from dm_broadcast.catalog import ListCatalog
+from dm_broadcast.journal import Journal
+from dm_broadcast.pool import tokens_do_ambiente
+from dm_broadcast.workspaces import MultiWorkspaceRunner, workspaces_do_ambiente
+
+# =========================
+# LINHA DE COMANDO (SEM INTERFACE)
+# =========================
+# Códigos de saída: 0 = concluída sem erros, 1 = erros ou interrompida, 2 = uso inválido
+SAIDA_OK, SAIDA_FALHA, SAIDA_USO = 0, 1, 2
+
+
+def log_console(msg, tipo="info"):
+    """Log com horário, pensado para terminal e cron"""
+    destino = sys.stderr if tipo == "error" else sys.stdout
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", file=destino, flush=True)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m dm_broadcast",
+        description="Envio de DMs em massa pelo Slack sem abrir a interface.",
+    )
+    parser.add_argument("--base-dir", default=".", help="pasta com listas/, logs/ e cache/ (padrão: atual)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    send = sub.add_parser("send", help="envia uma campanha nova")
+    send.add_argument("--lists", nargs="+", required=True, metavar="LISTA",
+                      help="listas de listas/ (com ou sem .txt)")
+    mensagem = send.add_mutually_exclusive_group(required=True)
+    mensagem.add_argument("--message", help="texto da mensagem (aceita {{campos}})")
+    mensagem.add_argument("--message-file", help="arquivo UTF-8 com o texto da mensagem")
+    send.add_argument("--attach", nargs="+", default=[], metavar="ARQUIVO", help="arquivos a anexar")
+    send.add_argument("--workers", type=int, default=4, help="envios simultâneos (padrão: 4)")
+    send.add_argument("--delay", type=float, default=0.0, help="pausa extra por envio, em segundos")
+    send.add_argument("--by-reference", action="store_true",
+                      help="sobe os anexos uma vez e envia só o link em cada DM")
+    send.add_argument("--allow-resend", action="store_true",
+                      help="reenvia mesmo para quem já recebeu a mesma mensagem")
+    send.add_argument("--start", metavar="\"AAAA-MM-DD HH:MM\"",
+                      help="só começa neste horário (desta máquina, se não tiver fuso)")
+    send.add_argument("--window", metavar="HH:MM-HH:MM",
+                      help="só envia neste horário local de cada destinatário (ex.: 09:00-18:00)")
+    send.add_argument("--dry-run", action="store_true", help="simula o envio sem chamar o Slack")
+
+    resume = sub.add_parser("resume", help="retoma a última campanha interrompida")
+    resume.add_argument("--dry-run", action="store_true", help="simula o envio sem chamar o Slack")
+
+    serve = sub.add_parser("serve", help="sobe a API HTTP local que recebe campanhas")
+    serve.add_argument("--host", default="127.0.0.1", help="endereço (padrão: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="porta (padrão: 8765)")
+    serve.add_argument("--concurrent", type=int, default=2,
+                       help="campanhas rodando ao mesmo tempo (padrão: 2)")
+    return parser
+
+
+def endereco_local(host):
+    """Indica se o endereço só aceita conexões desta máquina"""
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:  # nome de máquina: pode resolver para qualquer interface
+        return False
+
+
+def servir(args, journal, catalogo, checkpoint_dir, log_dir, conexao, workspaces, cache_dir, ttl):
+    """Roda a API HTTP com uma fila de campanhas até o processo ser encerrado"""
+    chave_api = os.getenv("DM_BROADCAST_API_KEY") or None
+    if not chave_api and not endereco_local(args.host):
+        log_console(f"❌ --host {args.host} aceita conexões de fora: defina DM_BROADCAST_API_KEY no .env", "error")
+        return SAIDA_USO
+    try:
+        import uvicorn
+    except ImportError:
+        log_console("❌ uvicorn não está instalado (pip install -r requirements.txt)", "error")
+        return SAIDA_USO
+    from dm_broadcast.api import criar_app
+    from dm_broadcast.jobs import JobQueue, JobStore
+
+    if conexao is None and not workspaces:
+        log_console("⚠️ SLACK_BOT_TOKEN/SLACK_BOT_TOKENS não definido: todas as campanhas serão simuladas", "warning")
+    if workspaces and args.concurrent > 1:
+        log_console("⚠️ Com SLACK_WORKSPACES a fila roda uma campanha por vez (--concurrent ignorado): "
+                    "cada campanha já ocupa o limite de todos os workspaces", "warning")
+    # A fila fica em disco: campanhas pendentes sobrevivem a reinícios do serviço
+    store = JobStore(log_dir / "fila.db")
+    fila = JobQueue(store, journal, checkpoint_dir, log_dir, conexao=conexao, campos_lista=catalogo.campos,
+                    canal_anexos=os.getenv("SLACK_CANAL_ANEXOS") or None, simultaneas=args.concurrent,
+                    workspaces=workspaces, cache_dir=cache_dir, ttl=ttl)
+    fila.iniciar()
+    app = criar_app(fila, catalogo, chave_api=chave_api, base_dir=args.base_dir)
+    log_console(f"🌐 API de campanhas em http://{args.host}:{args.port} ({fila.simultaneas} simultânea(s))")
+    try:
+        uvicorn.run(app, host=args.host, port=args.port)
+    finally:
+        fila.parar()
+        store.fechar()
+    return SAIDA_OK
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    base = Path(args.base_dir)
+    listas_dir, log_dir, cache_dir = base / "listas", base / "logs", base / "cache"
+    checkpoint_dir = log_dir / "checkpoints"
+    for pasta in (listas_dir, log_dir, cache_dir):
+        pasta.mkdir(parents=True, exist_ok=True)
+
+    load_dotenv(base / ".env")
+    dry_run = getattr(args, "dry_run", False)
+    ttl = float(os.getenv("SLACK_DIRETORIO_TTL", "3600"))
+    # Com SLACK_WORKSPACES cada workspace tem os seus tokens (SLACK_BOT_TOKEN_<NOME>)
+    workspaces = workspaces_do_ambiente()
+    tokens = [] if dry_run or workspaces else tokens_do_ambiente()
+    if workspaces:
+        sem_token = [nome for nome, tokens_ws in workspaces.items() if not tokens_ws]
+        if sem_token and not dry_run:
+            log_console(f"❌ Workspace(s) sem token: {', '.join(sem_token)} "
+                        f"(defina SLACK_BOT_TOKEN_{sem_token[0].upper()})", "error")
+            return SAIDA_USO
+    elif not tokens and not dry_run and args.comando != "serve":
+        log_console("❌ SLACK_BOT_TOKEN/SLACK_BOT_TOKENS não definido (use --dry-run para simular)", "error")
+        return SAIDA_USO
+
+    catalogo = ListCatalog(listas_dir)
+    _, _, erros = catalogo.atualizar()
+    for nome, erro in erros.items():
+        log_console(f"⚠️ Erro ao ler {nome}: {erro}", "warning")
+
+    journal = Journal(log_dir / "envios.db")
+    try:
+        conexao = None
+        if tokens:
+            conexao = conectar(tokens, cache_dir, ttl=ttl)
+        if args.comando == "serve":
+            return servir(args, journal, catalogo, checkpoint_dir, log_dir, conexao, workspaces, cache_dir, ttl)
+
+        campanha_id = None
+        if args.comando == "send":
+            if args.message_file:
+                with open(args.message_file, "r", encoding="utf-8") as f:
+                    mensagem = f.read()
+            else:
+                mensagem = args.message
+            try:
+                parametros, lista_de_origem = preparar_campanha(
+                    catalogo, args.lists, mensagem, args.attach, delay=args.delay,
+                    trabalhadores=args.workers, por_referencia=args.by_reference,
+                    permitir_reenvio=args.allow_resend, inicio=args.start, janela=args.window,
+                )
+            except CampaignError as e:
+                log_console(f"❌ {e}", "error")
+                return SAIDA_USO
+        else:
+            retomada = campanha_para_retomar(journal, checkpoint_dir)
+            if not retomada:
+                log_console("Nenhuma campanha interrompida para retomar")
+                return SAIDA_OK
+            campanha, parametros, lista_de_origem, concluidos = retomada
+            campanha_id = campanha["id"]
+            log_console(f"♻️ Retomando campanha #{campanha_id}: {len(concluidos)} já enviada(s), "
+                        f"{len(lista_de_origem)} pendente(s)")
+
+        canal_anexos = os.getenv("SLACK_CANAL_ANEXOS") or None
+        if workspaces:
+            # Um processo por workspace; o log de todos chega aqui
+            motor = MultiWorkspaceRunner(
+                journal, parametros, lista_de_origem, checkpoint_dir, workspaces, cache_dir,
+                campos_lista=catalogo.campos, canal_anexos=canal_anexos,
+                log=log_console, campanha_id=campanha_id, ttl=ttl, simulacao=dry_run,
+            )
+        else:
+            pool, diretorio = conexao or (None, None)
+            motor = CampaignRunner(
+                journal, parametros, lista_de_origem, checkpoint_dir,
+                pool=pool, diretorio=diretorio,
+                campos_lista=catalogo.campos, canal_anexos=canal_anexos,
+                log=log_console, campanha_id=campanha_id,
+            )
+        # Ctrl+C ou kill: termina as chamadas em voo e deixa a campanha retomável
+        for sinal in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sinal, lambda *_: motor.cancelar())
+
+        log_csv = log_csv_da_campanha(journal, log_dir, campanha_id)
+        concluida = motor.executar(log_csv)
+        if motor.campanha_id is not None:
+            log_console(f"🗄️ Campanha #{motor.campanha_id} | log: {log_csv}")
+        return SAIDA_OK if concluida and not motor.totais["erros"] else SAIDA_FALHA
+    finally:
+        journal.fechar()
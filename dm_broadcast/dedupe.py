@@ -0,0 +1,81 @@
+import hashlib
+import math
+import threading
+
+# =========================
+# DEDUPLICAÇÃO DE ENVIOS
+# =========================
+# Acima disso as chaves vão para um filtro de Bloom em vez de um set
+LIMITE_SET = 500_000
+
+
+def sha256_texto(texto):
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def chave_dedupe(mensagem, user_id, texto, hashes_anexos=""):
+    """Chave de idempotência: modelo da campanha + usuário + texto renderizado + anexos
+
+    O modelo (e não o id da execução) identifica a campanha, de modo que a
+    mesma mensagem não é reenviada em outra execução ou seleção de listas.
+    """
+    partes = (sha256_texto(mensagem), user_id, sha256_texto(texto), hashes_anexos)
+    return hashlib.sha256("\0".join(partes).encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    """Filtro de Bloom simples (double hashing sobre o SHA-256 da chave)"""
+
+    def __init__(self, capacidade, taxa_erro=0.001):
+        capacidade = max(1, capacidade)
+        self.bits = max(8, int(-capacidade * math.log(taxa_erro) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.bits / capacidade * math.log(2)))
+        self._dados = bytearray((self.bits + 7) // 8)
+
+    def _posicoes(self, chave):
+        digest = hashlib.sha256(chave.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.k))
+
+    def adicionar(self, chave):
+        for pos in self._posicoes(chave):
+            self._dados[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, chave):
+        return all(self._dados[pos >> 3] & (1 << (pos & 7)) for pos in self._posicoes(chave))
+
+
+class DedupeIndex:
+    """Índice em memória das chaves já entregues, carregado do diário
+
+    Históricos pequenos ficam num set; grandes num filtro de Bloom, cujos
+    positivos são confirmados no diário (consulta indexada) para não
+    descartar envios por falso positivo.
+    """
+
+    def __init__(self, chaves, total=None, confirmar=None, limite_set=LIMITE_SET):
+        self._lock = threading.Lock()
+        self._confirmar = confirmar
+        total = total if total is not None else len(chaves)
+        if total > limite_set and confirmar is not None:
+            self._bloom = BloomFilter(total * 2)
+            for chave in chaves:
+                self._bloom.adicionar(chave)
+            self._novas = set()
+        else:
+            self._bloom = None
+            self._novas = set(chaves)
+
+    def contem(self, chave):
+        """Indica se a chave já foi entregue antes"""
+        with self._lock:
+            if chave in self._novas:
+                return True
+            if self._bloom is None or chave not in self._bloom:
+                return False
+        return self._confirmar(chave)
+
+    def adicionar(self, chave):
+        with self._lock:
+            self._novas.add(chave)
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from dm_broadcast.index import UserIndex
+
+# =========================
+# DIRETÓRIO DE USUÁRIOS DO SLACK
+# =========================
+VERSAO_CACHE = 4
+TAMANHO_PAGINA = 200
+
+
+def compactar_membro(user):
+    """Reduz o payload de users.list aos campos usados no envio"""
+    profile = user.get("profile") or {}
+    return {
+        "id": user["id"],
+        "real_name": (profile.get("real_name") or user.get("real_name") or "").strip(),
+        "display_name": (profile.get("display_name") or "").strip(),
+        "email": (profile.get("email") or "").strip(),
+        "title": (profile.get("title") or "").strip(),
+        "is_bot": bool(user.get("is_bot")),
+        "deleted": bool(user.get("deleted")),
+        "tz": user.get("tz") or "",
+        "tz_offset": int(user.get("tz_offset") or 0),
+        "updated": int(user.get("updated") or 0),
+    }
+
+
+class UserDirectory:
+    """Diretório de membros do workspace com paginação e cache em disco"""
+
+    def __init__(self, client, cache_file, ttl=3600):
+        self.client = client
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self.versao = 0  # incrementada a cada mudança no snapshot
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._membros = None  # id -> registro compacto
+        self._indice = None
+        self._indice_versao = -1
+        self._marca_dagua = 0
+        self._sincronizado_em = 0.0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def membros(self):
+        """Retorna os membros sem bloquear quando já existe um snapshot"""
+        with self._lock:
+            if self._membros is None:
+                self._carregar_cache()
+            snapshot = self._membros
+        if snapshot is None:
+            # Primeira execução: não há o que servir, baixa tudo agora
+            self.sincronizar()
+        elif self.expirado():
+            self._sincronizar_em_segundo_plano()
+        with self._lock:
+            return list(self._membros.values())
+
+    def indice(self):
+        """Índice de busca do snapshot atual, reconstruído só quando a versão muda"""
+        self.membros()  # garante que há um snapshot carregado
+        with self._lock:
+            if self._indice is None or self._indice_versao != self.versao:
+                self._indice = UserIndex(self._membros.values())
+                self._indice_versao = self.versao
+            return self._indice
+
+    def expirado(self):
+        """Indica se o snapshot atual passou do TTL configurado"""
+        return time.time() - self._sincronizado_em > self.ttl
+
+    def invalidar(self):
+        """Força nova leitura da API na próxima consulta"""
+        with self._lock:
+            self._sincronizado_em = 0.0
+
+    def sincronizar(self):
+        """Sincronização incremental: mescla apenas membros alterados ou removidos"""
+        if not self._sync_lock.acquire(blocking=False):
+            # Já existe uma sincronização em andamento; aguarda o resultado
+            self._sync_lock.acquire()
+            with self._lock:
+                tem_snapshot = self._membros is not None
+            if tem_snapshot:
+                self._sync_lock.release()
+                return 0
+            # A outra sincronização falhou antes do primeiro snapshot: tenta de novo aqui,
+            # e um erro da API chega a quem chamou em vez de um diretório vazio
+        try:
+            vistos = {}
+            for membro in self._percorrer():
+                vistos[membro["id"]] = membro
+
+            with self._lock:
+                atual = self._membros or {}
+                marca = self._marca_dagua
+                alterados = 0
+                for uid, membro in vistos.items():
+                    anterior = atual.get(uid)
+                    # Só entra o que mudou depois da marca d'água (ou é novo)
+                    if (anterior is None
+                            or membro["updated"] > marca
+                            or membro["deleted"] != anterior["deleted"]):
+                        atual[uid] = membro
+                        alterados += 1
+                # Contas que sumiram da listagem completa saem do cache
+                for uid in [u for u in atual if u not in vistos]:
+                    del atual[uid]
+                    alterados += 1
+
+                self._membros = atual
+                self._marca_dagua = max([marca] + [m["updated"] for m in vistos.values()])
+                self._sincronizado_em = time.time()
+                if alterados:
+                    self.versao += 1
+                snapshot = list(atual.values())
+
+            self._salvar_cache(snapshot)
+            return alterados
+        finally:
+            self._sync_lock.release()
+
+    def iniciar_atualizacao(self, intervalo=60, ocioso=None):
+        """Mantém o diretório aquecido em uma thread de fundo enquanto a UI está ociosa"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            with self._lock:
+                if self._membros is None:
+                    self._carregar_cache()
+            while not self._parar.is_set():
+                if (ocioso is None or ocioso()) and (self._membros is None or self.expirado()):
+                    try:
+                        self.sincronizar()
+                    except Exception as e:
+                        print(f"⚠️ Falha ao atualizar diretório: {e}")
+                self._parar.wait(intervalo)
+
+        self._parar.clear()
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def parar_atualizacao(self):
+        """Encerra a thread de atualização em segundo plano"""
+        self._parar.set()
+
+    def _sincronizar_em_segundo_plano(self):
+        """Dispara uma sincronização sem bloquear quem chamou"""
+        if not self._sync_lock.locked():
+            threading.Thread(target=self.sincronizar, daemon=True).start()
+
+    def _percorrer(self):
+        """Percorre users.list seguindo o cursor até a última página"""
+        cursor = None
+        while True:
+            kwargs = {"limit": TAMANHO_PAGINA}
+            if cursor:
+                kwargs["cursor"] = cursor
+            resposta = self.client.users_list(**kwargs)
+            for user in resposta["members"]:
+                yield compactar_membro(user)
+            cursor = (resposta.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return
+
+    def _carregar_cache(self):
+        """Lê o snapshot salvo em disco, se existir e for compatível"""
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return
+        if dados.get("versao") != VERSAO_CACHE:
+            return
+        self._membros = {m["id"]: m for m in dados.get("membros", [])}
+        self._marca_dagua = dados.get("marca_dagua", 0)
+        self._sincronizado_em = dados.get("sincronizado_em", 0.0)
+        self.versao += 1
+
+    def _salvar_cache(self, membros):
+        """Grava o snapshot de forma atômica (arquivo temporário + replace)"""
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_suffix(self.cache_file.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "versao": VERSAO_CACHE,
+                "sincronizado_em": self._sincronizado_em,
+                "marca_dagua": self._marca_dagua,
+                "membros": membros,
+            }, f, ensure_ascii=False)
+        os.replace(tmp, self.cache_file)
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# =========================
+# MOTOR DE DESPACHO CONCORRENTE
+# =========================
+class RetryLater(Exception):
+    """Sinaliza ao Dispatcher que o item deve voltar à fila após `espera` segundos"""
+
+    def __init__(self, espera=0.0, limitado=False, erro=""):
+        super().__init__(erro or f"nova tentativa em {espera:.1f}s")
+        self.espera = espera
+        self.limitado = limitado  # True quando a causa foi um 429
+        self.erro = erro
+
+
+class Dispatcher:
+    """Pool de threads que processa destinatários em paralelo
+
+    O ritmo real é ditado pelo RateLimiter do cliente; o pool só garante
+    que haja chamadas em voo suficientes para aproveitar o limite da API.
+    Itens que levantam RetryLater voltam à fila com backoff exponencial e
+    jitter, e 429 em sequência reduzem a concorrência (AIMD). Uma agenda
+    opcional segura cada item até o seu horário de liberação.
+    """
+
+    def __init__(self, trabalhadores=4, max_tentativas=5, backoff_base=1.0,
+                 backoff_max=60.0, janela_429=10.0):
+        self.trabalhadores = max(1, int(trabalhadores))
+        self.max_tentativas = max_tentativas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.janela_429 = janela_429
+        self.limite = float(self.trabalhadores)  # concorrência atual (AIMD)
+        self._cancelado = threading.Event()
+        self._cond = threading.Condition()
+        self._fila = []
+        self._seq = itertools.count()
+        self._ativos = 0
+        self._ultimos_429 = []
+        self._agenda = None
+
+    def cancelar(self):
+        """Interrompe o despacho após as chamadas em andamento"""
+        with self._cond:
+            self._cancelado.set()
+            self._cond.notify_all()
+
+    def executar(self, itens, fn, ao_desistir=None, agenda=None):
+        """Chama fn(item) para cada item e bloqueia até todos terminarem
+
+        fn pode levantar RetryLater para reagendar o item; esgotadas as
+        tentativas, ao_desistir(item, erro) é chamado. Outras exceções de
+        fn contam como falha transitória (mesmo backoff do RetryLater).
+        agenda(item, instante) devolve o primeiro horário (time.time())
+        a partir de `instante` em que o item pode sair.
+        Devolve True se a fila esvaziou (False quando cancelado no meio).
+        """
+        self._agenda = agenda
+        with self._cond:
+            for item in itens:
+                heapq.heappush(self._fila, (self._liberacao(item), next(self._seq), item, 0))
+            total = len(self._fila)
+
+        threads = [
+            threading.Thread(target=self._loop, args=(fn, ao_desistir), daemon=True)
+            for _ in range(min(self.trabalhadores, max(1, total)))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with self._cond:
+            return not self._fila
+
+    def _proximo(self):
+        """Espera um item pronto e uma vaga de concorrência; None quando acabou"""
+        with self._cond:
+            while True:
+                if self._cancelado.is_set():
+                    return None
+                if not self._fila and self._ativos == 0:
+                    self._cond.notify_all()
+                    return None
+                agora = time.monotonic()
+                if self._fila and self._fila[0][0] <= agora and self._ativos < int(self.limite):
+                    _, _, item, tentativa = heapq.heappop(self._fila)
+                    relogio = time.time()
+                    if self._agenda is not None and self._agenda(item, relogio) > relogio:
+                        # A janela fechou enquanto o item esperava na fila
+                        heapq.heappush(self._fila, (self._liberacao(item), next(self._seq), item, tentativa))
+                        continue
+                    self._ativos += 1
+                    return item, tentativa
+                espera = None
+                if self._fila and self._fila[0][0] > agora:
+                    espera = self._fila[0][0] - agora
+                self._cond.wait(espera)
+
+    def _loop(self, fn, ao_desistir):
+        while True:
+            proximo = self._proximo()
+            if proximo is None:
+                return
+            item, tentativa = proximo
+            try:
+                fn(item)
+                self._sucesso()
+            except RetryLater as r:
+                self._falhou(item, tentativa, r, ao_desistir)
+            except Exception as e:
+                # Um erro inesperado não pode derrubar a thread e deixar itens na fila
+                self._falhou(item, tentativa, RetryLater(erro=f"{type(e).__name__}: {e}"), ao_desistir)
+            finally:
+                with self._cond:
+                    self._ativos -= 1
+                    self._cond.notify_all()
+
+    def _falhou(self, item, tentativa, r, ao_desistir):
+        """Reagenda o item ou, esgotadas as tentativas, desiste dele"""
+        if tentativa + 1 < self.max_tentativas:
+            self._reagendar(item, tentativa + 1, r)
+        elif ao_desistir:
+            ao_desistir(item, r)
+
+    def _reagendar(self, item, tentativa, r):
+        """Devolve o item à fila com backoff exponencial e jitter"""
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** tentativa))
+        espera = max(r.espera, random.uniform(0.5, 1.0) * backoff)
+        with self._cond:
+            if r.limitado:
+                self._registrar_429()
+            heapq.heappush(self._fila, (self._liberacao(item, espera), next(self._seq), item, tentativa))
+            self._cond.notify_all()
+
+    def _liberacao(self, item, espera=0.0):
+        """Instante (monotônico) em que o item pode sair, respeitando a agenda"""
+        pronto = time.monotonic() + espera
+        if self._agenda is None:
+            return pronto
+        relogio = time.time() + espera
+        return pronto + max(0.0, self._agenda(item, relogio) - relogio)
+
+    def _registrar_429(self):
+        """Decremento multiplicativo quando os 429 se agrupam (chamar com lock)"""
+        agora = time.monotonic()
+        self._ultimos_429 = [t for t in self._ultimos_429 if agora - t < self.janela_429]
+        self._ultimos_429.append(agora)
+        if len(self._ultimos_429) >= 2:
+            self.limite = max(1.0, self.limite / 2)
+            self._ultimos_429.clear()
+
+    def _sucesso(self):
+        """Incremento aditivo: +1 de concorrência a cada `limite` sucessos"""
+        with self._cond:
+            if self.limite < self.trabalhadores:
+                self.limite = min(float(self.trabalhadores), self.limite + 1 / self.limite)
+                self._cond.notify_all()
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from slack_sdk.errors import SlackApiError
+
+# =========================
+# CACHE DE CANAIS DE DM
+# =========================
+# Erros que indicam que o canal salvo não serve mais e deve ser reaberto
+ERROS_CANAL_INVALIDO = {"channel_not_found", "is_archived"}
+
+
+def identidade_token(client):
+    """Identifica workspace e token (team_id, hash curto do token)"""
+    resposta = client.auth_test()
+    token_hash = hashlib.sha256((client.token or "").encode("utf-8")).hexdigest()[:12]
+    return resposta["team_id"], token_hash
+
+
+class DMChannelCache:
+    """Mapa persistente user_id -> canal de DM, por workspace e token"""
+
+    def __init__(self, client, cache_dir):
+        self.client = client
+        self.cache_dir = Path(cache_dir)
+        self.cache_file = None
+        self._lock = threading.Lock()
+        self._canais = None
+        self._sujo = False
+
+    def canal(self, user_id):
+        """Retorna o canal de DM do usuário, abrindo com conversations.open só se necessário"""
+        with self._lock:
+            self._garantir_carregado()
+            canal_id = self._canais.get(user_id)
+        if canal_id:
+            return canal_id
+
+        dm = self.client.conversations_open(users=user_id)
+        canal_id = dm["channel"]["id"]
+        with self._lock:
+            self._canais[user_id] = canal_id
+            self._sujo = True
+        return canal_id
+
+    def invalidar(self, user_id):
+        """Remove um canal que deixou de ser válido"""
+        with self._lock:
+            self._garantir_carregado()
+            if self._canais.pop(user_id, None):
+                self._sujo = True
+
+    def enviar(self, user_id, fn):
+        """Executa fn(canal_id); se o canal estiver obsoleto, reabre e tenta de novo uma vez"""
+        canal_id = self.canal(user_id)
+        try:
+            return fn(canal_id)
+        except SlackApiError as e:
+            if e.response.get("error") not in ERROS_CANAL_INVALIDO:
+                raise
+            self.invalidar(user_id)
+            return fn(self.canal(user_id))
+
+    def salvar(self):
+        """Persiste o cache em disco se houve alterações"""
+        with self._lock:
+            if not self._sujo or self.cache_file is None:
+                return
+            dados = dict(self._canais)
+            self._sujo = False
+
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_suffix(self.cache_file.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f)
+        os.replace(tmp, self.cache_file)
+
+    def _garantir_carregado(self):
+        """Resolve a identidade do token e lê o cache correspondente (chamar com lock)"""
+        if self._canais is not None:
+            return
+        team_id, token_hash = identidade_token(self.client)
+        self.cache_file = self.cache_dir / f"dm_canais_{team_id}_{token_hash}.json"
+        self._canais = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    self._canais = json.load(f)
+            except (OSError, ValueError):
+                self._canais = {}
@@ -0,0 +1,56 @@
+# =========================
+# ÍNDICE DE BUSCA DE USUÁRIOS
+# =========================
+def normalize_name(name):
+    """Normaliza nomes para comparação"""
+    return (name or "").strip().lower()
+
+
+class UserIndex:
+    """Índice hash nome/apelido/e-mail/id -> membros, montado uma vez por snapshot"""
+
+    def __init__(self, membros):
+        self._chaves = {}
+        for membro in membros:
+            if membro.get("is_bot") or membro.get("deleted"):
+                continue
+            chaves = {
+                normalize_name(membro.get("real_name")),
+                normalize_name(membro.get("display_name")),
+                normalize_name(membro.get("email")),
+                normalize_name(membro["id"]),
+            }
+            chaves.discard("")
+            for chave in chaves:
+                self._chaves.setdefault(chave, []).append(membro)
+
+    def __len__(self):
+        return len(self._chaves)
+
+    def buscar(self, nome):
+        """Retorna todos os membros associados ao nome (vazio se nenhum)"""
+        return self._chaves.get(normalize_name(nome), [])
+
+    def resolver(self, nomes):
+        """Resolve nomes em membros, separando não encontrados e ambíguos
+
+        Retorna (encontrados, nao_encontrados, ambiguos), onde encontrados é
+        uma lista de (nome, membro) na ordem recebida, sem repetir o mesmo id,
+        e ambiguos mapeia nome -> membros que compartilham a chave.
+        """
+        encontrados = []
+        nao_encontrados = []
+        ambiguos = {}
+        ids_vistos = set()
+
+        for nome in nomes:
+            membros = self.buscar(nome)
+            if not membros:
+                nao_encontrados.append(nome)
+            elif len(membros) > 1:
+                ambiguos[nome] = membros
+            elif membros[0]["id"] not in ids_vistos:
+                ids_vistos.add(membros[0]["id"])
+                encontrados.append((nome, membros[0]))
+
+        return encontrados, nao_encontrados, ambiguos
@@ -0,0 +1,316 @@
+import collections
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from dm_broadcast.campaign import CampaignRunner, log_csv_da_campanha, pendentes_da_campanha
+from dm_broadcast.schedule import DeliverySchedule
+from dm_broadcast.workspaces import MultiWorkspaceRunner
+
+# =========================
+# FILA PERSISTENTE DE CAMPANHAS
+# =========================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    criado_em TEXT NOT NULL,
+    prioridade INTEGER NOT NULL DEFAULT 0,
+    inicio REAL,
+    estado TEXT NOT NULL DEFAULT 'NA_FILA',
+    simulacao INTEGER NOT NULL DEFAULT 0,
+    parametros TEXT NOT NULL,
+    destinatarios TEXT NOT NULL,
+    campanha_id INTEGER,
+    iniciado_em TEXT,
+    terminado_em TEXT,
+    log_csv TEXT,
+    totais TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_fila ON jobs(estado, prioridade DESC, id);
+"""
+
+ESTADOS_FINAIS = ("CONCLUIDA", "FALHOU", "CANCELADA")
+LINHAS_LOG_JOB = 50
+
+
+def agora():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class JobStore:
+    """Jobs de campanha em SQLite: sobrevivem ao fechamento do processo"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrar()
+
+    def _migrar(self):
+        """Adiciona colunas novas em filas criadas por versões anteriores"""
+        colunas = {l["name"] for l in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "inicio" not in colunas:
+            with self._conn:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN inicio REAL")
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+    def adicionar(self, parametros, lista_de_origem, prioridade=0, simulacao=False, inicio=None):
+        """Grava um job novo na fila e devolve o id (`inicio` em epoch: não sai antes disso)"""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (criado_em, prioridade, inicio, simulacao, parametros, destinatarios) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (agora(), prioridade, inicio, int(simulacao), json.dumps(parametros, ensure_ascii=False),
+                 json.dumps(lista_de_origem, ensure_ascii=False)),
+            )
+            return cur.lastrowid
+
+    def reservar(self):
+        """Tira da fila o job mais prioritário (mais antigo no empate) e o marca EXECUTANDO
+
+        Jobs com início agendado só saem quando o horário chega, sem ocupar
+        um executor enquanto esperam.
+        """
+        with self._lock, self._conn:
+            linha = self._conn.execute(
+                "SELECT * FROM jobs WHERE estado = 'NA_FILA' AND (inicio IS NULL OR inicio <= ?) "
+                "ORDER BY prioridade DESC, id LIMIT 1",
+                (time.time(),),
+            ).fetchone()
+            if linha is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET estado = 'EXECUTANDO', iniciado_em = COALESCE(iniciado_em, ?) WHERE id = ?",
+                (agora(), linha["id"]),
+            )
+            return linha
+
+    def atualizar(self, job_id, **campos):
+        """Altera colunas de um job (dicionários viram JSON)"""
+        if not campos:
+            return
+        valores = [json.dumps(v) if isinstance(v, dict) else v for v in campos.values()]
+        atribuicoes = ", ".join(f"{coluna} = ?" for coluna in campos)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {atribuicoes} WHERE id = ?", (*valores, job_id))
+
+    def cancelar(self, job_id):
+        """Marca como CANCELADA se ainda não terminou; indica se mudou"""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "UPDATE jobs SET estado = 'CANCELADA', terminado_em = ? "
+                "WHERE id = ? AND estado IN ('NA_FILA', 'EXECUTANDO')",
+                (agora(), job_id),
+            )
+            return cur.rowcount > 0
+
+    def recuperar(self):
+        """Jobs que estavam EXECUTANDO quando o processo morreu voltam para a fila"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET estado = 'NA_FILA' WHERE estado = 'EXECUTANDO'"
+            ).rowcount
+
+    def job(self, job_id):
+        with self._lock:
+            return self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def jobs(self, limite=100):
+        """Jobs mais recentes primeiro"""
+        with self._lock:
+            return self._conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limite,)).fetchall()
+
+
+class JobQueue:
+    """Agendador que roda várias campanhas da fila ao mesmo tempo
+
+    Todas usam a mesma `conexao` (pool, diretorio de `conectar()`),
+    portanto os mesmos limitadores de cada token; a prioridade
+    do job decide quem sai primeiro da fila e quem leva as fichas do
+    limitador quando há disputa. Com `workspaces` ({nome: tokens}) cada
+    campanha roda um processo por workspace (MultiWorkspaceRunner) e a
+    fila roda uma campanha por vez: os processos não dividem limitadores,
+    então duas campanhas simultâneas estourariam o limite de cada
+    workspace. Sem conexão, ou em jobs de simulação, a campanha roda sem
+    chamar o Slack.
+    """
+
+    def __init__(self, store, journal, checkpoint_dir, log_dir, conexao=None, campos_lista=None,
+                 canal_anexos=None, simultaneas=2, workspaces=None, cache_dir=None, ttl=3600):
+        self.store = store
+        self.journal = journal
+        self.checkpoint_dir = checkpoint_dir
+        self.log_dir = log_dir
+        self.conexao = conexao
+        self.campos_lista = campos_lista
+        self.canal_anexos = canal_anexos
+        self.simultaneas = 1 if workspaces else max(1, int(simultaneas))
+        self.workspaces = workspaces
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._ativos = {}  # job_id -> (runner, últimas linhas do log)
+        self._cond = threading.Condition()
+        self._parar = threading.Event()
+        self._threads = []
+
+    def enfileirar(self, parametros, lista_de_origem, simulacao=False, prioridade=0):
+        """Grava a campanha na fila e devolve o resumo do job"""
+        parametros = dict(parametros, prioridade=prioridade)
+        inicio = DeliverySchedule.dos_parametros(parametros).inicio
+        job_id = self.store.adicionar(parametros, lista_de_origem, prioridade,
+                                      simulacao or (self.conexao is None and not self.workspaces),
+                                      inicio.timestamp() if inicio else None)
+        with self._cond:
+            self._cond.notify()
+        return self.resumo(job_id)
+
+    def resumo(self, job_id):
+        """Estado e progresso de um job em um dicionário serializável (None se não existe)"""
+        linha = self.store.job(job_id)
+        return self._resumo(linha) if linha else None
+
+    def jobs(self, limite=100):
+        return [self._resumo(linha) for linha in self.store.jobs(limite)]
+
+    def cancelar(self, job_id):
+        """Cancela um job na fila ou em execução; False se já terminou"""
+        if not self.store.cancelar(job_id):
+            return False
+        ativo = self._ativos.get(job_id)
+        if ativo:
+            ativo[0].cancelar()
+        return True
+
+    def iniciar(self):
+        """Recoloca na fila o que ficou pela metade e sobe os executores"""
+        recuperados = self.store.recuperar()
+        if recuperados:
+            print(f"♻️ {recuperados} campanha(s) interrompida(s) voltaram para a fila")
+        self._parar.clear()
+        self._threads = [threading.Thread(target=self._loop, daemon=True) for _ in range(self.simultaneas)]
+        for t in self._threads:
+            t.start()
+
+    def parar(self, timeout=30.0):
+        """Não pega jobs novos; os que estão rodando são cancelados e ficam retomáveis"""
+        self._parar.set()
+        with self._cond:
+            self._cond.notify_all()
+        for runner, _ in list(self._ativos.values()):
+            runner.cancelar()
+        for t in self._threads:
+            t.join(timeout)
+
+    def _loop(self):
+        while not self._parar.is_set():
+            linha = self.store.reservar()
+            if linha is None:
+                with self._cond:
+                    self._cond.wait(timeout=5.0)
+                continue
+            self._executar(linha)
+
+    def _executar(self, linha):
+        job_id = linha["id"]
+        parametros = json.loads(linha["parametros"])
+        campanha_id = linha["campanha_id"]
+        if campanha_id is None:
+            lista_de_origem = json.loads(linha["destinatarios"])
+        else:
+            # Job recuperado: só quem ainda não recebeu
+            lista_de_origem, _ = pendentes_da_campanha(self.journal, self.checkpoint_dir, campanha_id)
+
+        linhas_log = collections.deque(maxlen=LINHAS_LOG_JOB)
+
+        def log(msg, tipo="info"):
+            linhas_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+        if self.workspaces:
+            runner = MultiWorkspaceRunner(
+                self.journal, parametros, lista_de_origem, self.checkpoint_dir, self.workspaces, self.cache_dir,
+                campos_lista=self.campos_lista, canal_anexos=self.canal_anexos, log=log,
+                campanha_id=campanha_id,
+                ao_iniciar=lambda cid: self.store.atualizar(job_id, campanha_id=cid),
+                ttl=self.ttl, simulacao=bool(linha["simulacao"]),
+            )
+        else:
+            pool, diretorio = (None, None) if linha["simulacao"] else self.conexao
+            runner = CampaignRunner(
+                self.journal, parametros, lista_de_origem, self.checkpoint_dir,
+                pool=pool, diretorio=diretorio,
+                campos_lista=self.campos_lista, canal_anexos=self.canal_anexos, log=log,
+                campanha_id=campanha_id,
+                ao_iniciar=lambda cid: self.store.atualizar(job_id, campanha_id=cid),
+            )
+        self._ativos[job_id] = (runner, linhas_log)
+        try:
+            # Um cancelamento que chegou antes do registro acima não alcançou o runner
+            if self.store.job(job_id)["estado"] != "EXECUTANDO" or self._parar.is_set():
+                concluida = False
+            else:
+                log_csv = log_csv_da_campanha(self.journal, self.log_dir, campanha_id)
+                self.store.atualizar(job_id, log_csv=log_csv.name)
+                concluida = runner.executar(log_csv)
+        except Exception as e:
+            log(f"❌ Erro inesperado: {e}", "error")
+            concluida = False
+        finally:
+            del self._ativos[job_id]
+
+        estado = self.store.job(job_id)["estado"]
+        if estado == "EXECUTANDO":
+            if self._parar.is_set() and not concluida:
+                # Encerramento do serviço: volta para a fila e retoma no próximo início
+                estado = "NA_FILA"
+            else:
+                estado = "CONCLUIDA" if concluida else "FALHOU"
+        self.store.atualizar(
+            job_id, estado=estado, totais=self._somar(linha, runner.totais),
+            terminado_em=agora() if estado in ESTADOS_FINAIS else None,
+        )
+
+    @staticmethod
+    def _somar(linha, totais):
+        """Totais de execuções anteriores (job retomado) mais os da atual"""
+        anteriores = json.loads(linha["totais"] or "{}")
+        return {chave: anteriores.get(chave, 0) + valor for chave, valor in totais.items()}
+
+    def _resumo(self, linha):
+        ativo = self._ativos.get(linha["id"])
+        if ativo:
+            totais, ultimas = self._somar(linha, dict(ativo[0].totais)), list(ativo[1])
+        else:
+            totais, ultimas = json.loads(linha["totais"] or "{}"), []
+        parametros = json.loads(linha["parametros"])
+        return {
+            "id": linha["id"],
+            "estado": linha["estado"],
+            "prioridade": linha["prioridade"],
+            "inicio": parametros.get("inicio"),
+            "janela": parametros.get("janela"),
+            "campanha_id": linha["campanha_id"],
+            "listas": parametros["listas"],
+            "simulacao": bool(linha["simulacao"]),
+            "criado_em": linha["criado_em"],
+            "iniciado_em": linha["iniciado_em"],
+            "terminado_em": linha["terminado_em"],
+            "progresso": {
+                "total": len(json.loads(linha["destinatarios"])),
+                "enviados": totais.get("enviados", 0),
+                "erros": totais.get("erros", 0),
+                "duplicados": totais.get("duplicados", 0),
+            },
+            "log_csv": linha["log_csv"],
+            "log": ultimas,
+        }
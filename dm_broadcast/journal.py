@@ -0,0 +1,450 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from dm_broadcast.audit import CABECALHO_CSV, BatchWriter
+from dm_broadcast.index import normalize_name
+
+# =========================
+# DIÁRIO DE ENTREGAS (SQLITE)
+# =========================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campanhas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    criada_em TEXT NOT NULL,
+    listas TEXT NOT NULL DEFAULT '',
+    mensagem TEXT NOT NULL DEFAULT '',
+    arquivos TEXT NOT NULL DEFAULT '',
+    sha256 TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'EM_ANDAMENTO',
+    log_csv TEXT,
+    parametros TEXT,
+    dono_pid INTEGER
+);
+CREATE TABLE IF NOT EXISTS destinatarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    campanha_id INTEGER NOT NULL REFERENCES campanhas(id),
+    alvo TEXT NOT NULL,
+    usuario TEXT NOT NULL DEFAULT '',
+    user_id TEXT,
+    lista TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'PENDENTE',
+    atualizado_em TEXT,
+    chave TEXT,
+    UNIQUE (campanha_id, alvo)
+);
+CREATE TABLE IF NOT EXISTS tentativas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    destinatario_id INTEGER NOT NULL REFERENCES destinatarios(id),
+    data TEXT NOT NULL,
+    status TEXT NOT NULL,
+    erro TEXT NOT NULL DEFAULT '',
+    mensagem TEXT NOT NULL DEFAULT ''
+);
+-- Chave reservada antes de cada DM: campanhas simultâneas não enviam a mesma mensagem duas vezes
+CREATE TABLE IF NOT EXISTS reservas (
+    chave TEXT PRIMARY KEY,
+    campanha_id INTEGER NOT NULL,
+    entregue INTEGER NOT NULL DEFAULT 0,
+    reservada_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_destinatarios_user_id ON destinatarios(user_id);
+CREATE INDEX IF NOT EXISTS idx_destinatarios_usuario ON destinatarios(usuario);
+CREATE INDEX IF NOT EXISTS idx_destinatarios_campanha_status ON destinatarios(campanha_id, status);
+CREATE INDEX IF NOT EXISTS idx_destinatarios_status ON destinatarios(status);
+CREATE INDEX IF NOT EXISTS idx_tentativas_destinatario ON tentativas(destinatario_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_campanhas_log_csv ON campanhas(log_csv);
+"""
+
+# Recriada em _migrar quando a definição muda (diários antigos recebem a versão nova)
+VIEW_LOG_CSV = """
+CREATE VIEW v_log_csv AS
+SELECT
+    d.campanha_id AS campanha_id,
+    t.id AS tentativa_id,
+    substr(t.data, 1, 10) AS Data,
+    substr(t.data, 12, 8) AS Hora,
+    -- Não encontrados e ambíguos não têm usuário do Slack: vale o nome da lista
+    COALESCE(NULLIF(d.usuario, ''), d.alvo) AS Usuario,
+    t.status AS Status,
+    d.lista AS Lista,
+    t.mensagem AS Mensagem,
+    c.arquivos AS Arquivos,
+    c.sha256 AS SHA256
+FROM tentativas t
+JOIN destinatarios d ON d.id = t.destinatario_id
+JOIN campanhas c ON c.id = d.campanha_id"""
+
+# Nomes de coluna encontrados nos CSVs antigos -> campo do diário
+COLUNAS_CSV_ANTIGO = {
+    "data": "data", "hora": "hora", "usuario": "usuario", "status": "status",
+    "lista": "lista", "mensagem": "mensagem",
+    "arquivo": "arquivos", "arquivos": "arquivos", "sha256": "sha256",
+}
+
+
+def agora():
+    """Timestamp local no formato usado pelo diário"""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def processo_vivo(pid):
+    """Indica se o processo `pid` (dono de uma campanha) ainda está rodando"""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # No Windows os.kill(pid, 0) encerraria o processo
+        import ctypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # acesso negado: existe, mas é de outro usuário
+        try:
+            codigo = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(codigo))
+            return codigo.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Journal:
+    """Diário de campanhas, destinatários e tentativas em um único SQLite (WAL)"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrar()
+
+    def _migrar(self):
+        """Adiciona colunas novas em diários criados por versões anteriores"""
+        colunas = {l["name"] for l in self._conn.execute("PRAGMA table_info(campanhas)")}
+        if "parametros" not in colunas:
+            with self._conn:
+                self._conn.execute("ALTER TABLE campanhas ADD COLUMN parametros TEXT")
+        if "dono_pid" not in colunas:
+            with self._conn:
+                self._conn.execute("ALTER TABLE campanhas ADD COLUMN dono_pid INTEGER")
+        colunas = {l["name"] for l in self._conn.execute("PRAGMA table_info(destinatarios)")}
+        if "chave" not in colunas:
+            with self._conn:
+                self._conn.execute("ALTER TABLE destinatarios ADD COLUMN chave TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_destinatarios_chave ON destinatarios(chave) "
+            "WHERE chave IS NOT NULL"
+        )
+        vista = self._conn.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = 'v_log_csv'").fetchone()
+        if vista is None or vista["sql"] != VIEW_LOG_CSV.strip():
+            with self._conn:
+                self._conn.execute("DROP VIEW IF EXISTS v_log_csv")
+                self._conn.execute(VIEW_LOG_CSV)
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+    # ----- campanhas -----
+    def criar_campanha(self, listas, mensagem, arquivos="", sha256="", log_csv=None,
+                       criada_em=None, parametros=None):
+        """Registra uma campanha nova e devolve o id
+
+        `parametros` guarda (em JSON) o necessário para retomar a campanha.
+        A campanha nasce EM_ANDAMENTO e pertence a este processo até ser finalizada.
+        """
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO campanhas (criada_em, listas, mensagem, arquivos, sha256, log_csv, parametros, dono_pid) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (criada_em or agora(), listas, mensagem, arquivos, sha256, log_csv,
+                 json.dumps(parametros, ensure_ascii=False) if parametros is not None else None, os.getpid()),
+            )
+            return cur.lastrowid
+
+    def assumir_campanha(self, campanha_id):
+        """Marca a campanha como EM_ANDAMENTO neste processo; False se outro processo vivo já a executa"""
+        with self._lock:
+            # BEGIN IMMEDIATE: dois processos não assumem a mesma campanha ao mesmo tempo
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                linha = self._conn.execute("SELECT dono_pid FROM campanhas WHERE id = ?", (campanha_id,)).fetchone()
+                if linha is None or (linha["dono_pid"] and processo_vivo(linha["dono_pid"])):
+                    self._conn.rollback()
+                    return False
+                self._conn.execute(
+                    "UPDATE campanhas SET status = 'EM_ANDAMENTO', dono_pid = ? WHERE id = ?",
+                    (os.getpid(), campanha_id),
+                )
+                self._conn.commit()
+                return True
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def finalizar_campanha(self, campanha_id, status="CONCLUIDA"):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE campanhas SET status = ?, dono_pid = NULL WHERE id = ?", (status, campanha_id)
+            )
+
+    def campanha(self, campanha_id):
+        with self._lock:
+            return self._conn.execute("SELECT * FROM campanhas WHERE id = ?", (campanha_id,)).fetchone()
+
+    def campanha_interrompida(self):
+        """Última campanha que não chegou ao fim (processo morto ou erro inesperado)
+
+        Campanhas que um processo vivo está executando (o serviço da API,
+        outra janela) ficam de fora: retomá-las duplicaria os envios.
+        """
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT * FROM campanhas WHERE status IN ('EM_ANDAMENTO', 'INTERROMPIDA') "
+                "AND parametros IS NOT NULL ORDER BY id DESC"
+            ).fetchall()
+        return next((l for l in linhas if not (l["dono_pid"] and processo_vivo(l["dono_pid"]))), None)
+
+    def pendentes(self, campanha_id, concluidos=()):
+        """(alvo, lista) dos destinatários ainda sem envio bem-sucedido"""
+        concluidos = set(concluidos)
+        return [
+            (l["alvo"], l["lista"])
+            for l in self.historico(campanha_id=campanha_id)
+            if l["status"] not in ("ENVIADO", "SIMULADO") and l["alvo"] not in concluidos
+        ]
+
+    # ----- destinatários e tentativas -----
+    def registrar_destinatarios(self, campanha_id, alvos):
+        """Cria os destinatários pendentes: alvos é uma lista de (alvo, lista)"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO destinatarios (campanha_id, alvo, lista, atualizado_em) "
+                "VALUES (?, ?, ?, ?)",
+                [(campanha_id, alvo, lista, agora()) for alvo, lista in alvos],
+            )
+
+    def registrar_tentativas(self, linhas):
+        """Grava um lote de tentativas em uma única transação
+
+        Cada linha é um dict com campanha_id, alvo, status e, opcionalmente,
+        usuario, user_id, lista, erro, mensagem e data.
+        """
+        with self._lock, self._conn:
+            for linha in linhas:
+                data = linha.get("data") or agora()
+                self._conn.execute(
+                    "INSERT INTO destinatarios (campanha_id, alvo, usuario, user_id, lista, status, atualizado_em, chave) "
+                    "VALUES (:campanha_id, :alvo, :usuario, :user_id, :lista, :status, :data, :chave) "
+                    "ON CONFLICT (campanha_id, alvo) DO UPDATE SET "
+                    "usuario = COALESCE(NULLIF(excluded.usuario, ''), usuario), "
+                    "user_id = COALESCE(excluded.user_id, user_id), "
+                    "lista = COALESCE(NULLIF(excluded.lista, ''), lista), "
+                    "chave = COALESCE(excluded.chave, chave), "
+                    "status = excluded.status, atualizado_em = excluded.atualizado_em",
+                    {
+                        "campanha_id": linha["campanha_id"], "alvo": linha["alvo"],
+                        "usuario": linha.get("usuario", ""), "user_id": linha.get("user_id"),
+                        "lista": linha.get("lista", ""), "status": linha["status"], "data": data,
+                        "chave": linha.get("chave"),
+                    },
+                )
+                destinatario_id = self._conn.execute(
+                    "SELECT id FROM destinatarios WHERE campanha_id = ? AND alvo = ?",
+                    (linha["campanha_id"], linha["alvo"]),
+                ).fetchone()[0]
+                self._conn.execute(
+                    "INSERT INTO tentativas (destinatario_id, data, status, erro, mensagem) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (destinatario_id, data, linha["status"], linha.get("erro", ""), linha.get("mensagem", "")),
+                )
+
+    # ----- consultas -----
+    def historico(self, usuario=None, user_id=None, campanha_id=None, status=None):
+        """Destinatários filtrados por usuário, campanha e/ou status (usa os índices)"""
+        filtros, params = [], []
+        if usuario is not None:
+            filtros.append("usuario = ?")
+            params.append(usuario)
+        if user_id is not None:
+            filtros.append("user_id = ?")
+            params.append(user_id)
+        if campanha_id is not None:
+            filtros.append("campanha_id = ?")
+            params.append(campanha_id)
+        if status is not None:
+            filtros.append("status = ?")
+            params.append(status)
+        sql = "SELECT * FROM destinatarios"
+        if filtros:
+            sql += " WHERE " + " AND ".join(filtros)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY id", params).fetchall()
+
+    def total_chaves_entregues(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM destinatarios WHERE chave IS NOT NULL AND status = 'ENVIADO'"
+            ).fetchone()[0]
+
+    def chaves_entregues(self):
+        """Itera as chaves de deduplicação dos envios bem-sucedidos, em blocos"""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT chave FROM destinatarios WHERE chave IS NOT NULL AND status = 'ENVIADO'"
+            )
+            while True:
+                lote = cur.fetchmany(10000)
+                if not lote:
+                    return
+                for linha in lote:
+                    yield linha[0]
+
+    def reservar_chave(self, chave, campanha_id):
+        """Reserva a chave antes do envio: 'reservada', 'entregue' ou 'ocupada'
+
+        'ocupada' quer dizer que outra campanha viva está enviando a mesma
+        mensagem para a mesma pessoa agora. Reservas da própria campanha (ou
+        de uma campanha cujo processo morreu) são retomadas.
+        """
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO reservas (chave, campanha_id, reservada_em) VALUES (?, ?, ?)",
+                (chave, campanha_id, agora()),
+            )
+            if cur.rowcount:
+                return "reservada"
+            linha = self._conn.execute(
+                "SELECT r.campanha_id, r.entregue, c.dono_pid FROM reservas r "
+                "LEFT JOIN campanhas c ON c.id = r.campanha_id WHERE r.chave = ?", (chave,)
+            ).fetchone()
+            if linha["entregue"]:
+                return "entregue"
+            if linha["campanha_id"] != campanha_id and linha["dono_pid"] and processo_vivo(linha["dono_pid"]):
+                return "ocupada"
+            self._conn.execute("UPDATE reservas SET campanha_id = ? WHERE chave = ?", (campanha_id, chave))
+            return "reservada"
+
+    def confirmar_chave(self, chave):
+        """Marca a reserva como entregue (as próximas campanhas a tratam como duplicada)"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE reservas SET entregue = 1 WHERE chave = ?", (chave,))
+
+    def liberar_chave(self, chave, campanha_id):
+        """Desfaz a reserva de um envio que falhou"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM reservas WHERE chave = ? AND campanha_id = ? AND entregue = 0", (chave, campanha_id)
+            )
+
+    def chave_entregue(self, chave):
+        """Confirma no diário (via índice) se a chave já foi entregue"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM destinatarios WHERE chave = ? AND status = 'ENVIADO' LIMIT 1", (chave,)
+            ).fetchone() is not None
+
+    def foi_entregue(self, campanha_id, user_id=None, usuario=None):
+        """Responde se o usuário recebeu a campanha"""
+        linhas = self.historico(usuario=usuario, user_id=user_id, campanha_id=campanha_id)
+        return any(l["status"] in ("ENVIADO", "SIMULADO") for l in linhas)
+
+    # ----- CSV -----
+    def exportar_csv(self, campanha_id, destino):
+        """Gera o CSV de log da campanha a partir da view v_log_csv"""
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT * FROM v_log_csv WHERE campanha_id = ? ORDER BY tentativa_id", (campanha_id,)
+            ).fetchall()
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE campanhas SET log_csv = ? WHERE id = ?", (Path(destino).name, campanha_id)
+                )
+        with open(destino, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CABECALHO_CSV)
+            writer.writerows([[l[c] for c in CABECALHO_CSV] for l in linhas])
+        return len(linhas)
+
+    def importar_csv(self, caminho):
+        """Importa um log_envio_*.csv antigo (qualquer variação de colunas)
+
+        Retorna o id da campanha criada, ou None se o arquivo já foi importado.
+        """
+        caminho = Path(caminho)
+        with self._lock:
+            existente = self._conn.execute(
+                "SELECT id FROM campanhas WHERE log_csv = ?", (caminho.name,)
+            ).fetchone()
+        if existente:
+            return None
+
+        with open(caminho, 'r', newline='', encoding='utf-8') as f:
+            leitor = csv.reader(f)
+            cabecalho = next(leitor, [])
+            if not cabecalho:
+                # CSV reservado por uma campanha ainda em andamento
+                return None
+            campos = [COLUNAS_CSV_ANTIGO.get(c.strip().lower()) for c in cabecalho]
+            registros = [
+                {campo: valor for campo, valor in zip(campos, linha) if campo}
+                for linha in leitor if linha
+            ]
+
+        primeiro = registros[0] if registros else {}
+        criada_em = f"{primeiro.get('data', '')} {primeiro.get('hora', '')}".strip() or agora()
+        campanha_id = self.criar_campanha(
+            listas=", ".join(sorted({r.get("lista", "") for r in registros} - {""})),
+            mensagem=primeiro.get("mensagem", ""),
+            arquivos=primeiro.get("arquivos", ""),
+            sha256=primeiro.get("sha256", ""),
+            log_csv=caminho.name,
+            criada_em=criada_em,
+        )
+        self.registrar_tentativas([
+            {
+                "campanha_id": campanha_id,
+                "alvo": normalize_name(r.get("usuario")),
+                "usuario": r.get("usuario", ""),
+                "lista": r.get("lista", ""),
+                "status": r.get("status", ""),
+                "mensagem": r.get("mensagem", ""),
+                "data": f"{r.get('data', '')} {r.get('hora', '')}".strip() or criada_em,
+            }
+            for r in registros
+        ])
+        self.finalizar_campanha(campanha_id, "IMPORTADA")
+        return campanha_id
+
+    def importar_logs(self, log_dir):
+        """Importa todos os CSVs de log ainda não presentes no diário"""
+        importadas = 0
+        for caminho in sorted(Path(log_dir).glob("log_envio_*.csv")):
+            if self.importar_csv(caminho) is not None:
+                importadas += 1
+        return importadas
+
+
+class JournalWriter(BatchWriter):
+    """Grava as tentativas no diário em lotes, fora do caminho de envio"""
+
+    def __init__(self, journal, **kwargs):
+        self.journal = journal
+        super().__init__(**kwargs)
+
+    def _gravar(self, linhas):
+        self.journal.registrar_tentativas(linhas)
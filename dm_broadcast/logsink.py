@@ -0,0 +1,91 @@
+import threading
+from pathlib import Path
+
+from dm_broadcast.audit import BatchWriter
+
+# =========================
+# LOG DA INTERFACE EM LOTES
+# =========================
+INTERVALO_UI = 0.1  # no máximo um redesenho a cada 100 ms
+MAX_POR_LOTE = 10_000
+TAMANHO_PAGINA = 200
+
+
+class LogSink(BatchWriter):
+    """Fila de entradas de log entregue à interface em lotes
+
+    Quem loga só enfileira; a thread do sink chama `renderizar(lote)` com
+    todas as entradas acumuladas, para que a UI faça uma única atualização
+    por lote em vez de uma por linha.
+    """
+
+    def __init__(self, renderizar, historico=None, intervalo=INTERVALO_UI, max_linhas=MAX_POR_LOTE):
+        self.renderizar = renderizar
+        self.historico = historico
+        # Repetir um redesenho que falhou não ajuda: o lote é descartado na hora
+        super().__init__(max_linhas=max_linhas, intervalo=intervalo, max_tentativas=1)
+
+    def _gravar(self, linhas):
+        if self.historico is not None:
+            self.historico.registrar(linhas)
+        self.renderizar(linhas)
+
+    def _finalizar(self):
+        if self.historico is not None:
+            self.historico.fechar()
+
+
+class LogHistory:
+    """Histórico completo do log em disco, lido por páginas
+
+    Cada entrada vira uma linha `hora<TAB>tipo<TAB>mensagem`. Em memória
+    fica só o offset do início de cada página, então o custo não cresce
+    com o tamanho da campanha.
+    """
+
+    def __init__(self, caminho, tamanho_pagina=TAMANHO_PAGINA):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.tamanho_pagina = tamanho_pagina
+        self._lock = threading.Lock()
+        self._arquivo = open(self.caminho, "a+b")
+        self._offsets = [0]  # início de cada página no arquivo
+        self._total = 0
+
+    def registrar(self, linhas):
+        """Acrescenta entradas (hora, mensagem, tipo) ao fim do arquivo"""
+        with self._lock:
+            self._arquivo.seek(0, 2)
+            for hora, msg, tipo in linhas:
+                if self._total and self._total % self.tamanho_pagina == 0:
+                    self._offsets.append(self._arquivo.tell())
+                texto = str(msg).replace("\t", " ").replace("\r", " ").replace("\n", " ")
+                self._arquivo.write(f"{hora}\t{tipo}\t{texto}\n".encode("utf-8"))
+                self._total += 1
+            self._arquivo.flush()
+
+    def total(self):
+        return self._total
+
+    def paginas(self):
+        return max(1, -(-self._total // self.tamanho_pagina))
+
+    def pagina(self, numero):
+        """Entradas (hora, mensagem, tipo) da página `numero` (começa em 0)"""
+        with self._lock:
+            if numero < 0 or numero >= len(self._offsets):
+                return []
+            self._arquivo.seek(self._offsets[numero])
+            entradas = []
+            for _ in range(self.tamanho_pagina):
+                linha = self._arquivo.readline()
+                if not linha:
+                    break
+                hora, tipo, msg = linha.decode("utf-8").rstrip("\n").split("\t", 2)
+                entradas.append((hora, msg, tipo))
+            return entradas
+
+    def fechar(self):
+        with self._lock:
+            if not self._arquivo.closed:
+                self._arquivo.close()
@@ -0,0 +1,61 @@
+import os
+import threading
+from pathlib import Path
+
+# =========================
+# CATÁLOGO DE MÍDIA
+# =========================
+
+
+class MediaCatalog:
+    """Arquivos de mídia por diretório, lidos com um único os.scandir
+
+    `diretorios` mapeia cada pasta para as extensões aceitas (sem
+    diferenciar maiúsculas). O resultado fica em cache até o mtime do
+    diretório mudar ou `invalidar()` ser chamado.
+    """
+
+    def __init__(self, diretorios):
+        self.diretorios = {Path(d): frozenset(ext.lower() for ext in exts) for d, exts in diretorios.items()}
+        self._lock = threading.Lock()
+        self._cache = {}  # diretório -> (mtime_ns, [Path])
+
+    def arquivos(self):
+        """Todos os arquivos suportados, diretório a diretório, em ordem alfabética"""
+        with self._lock:
+            resultado = []
+            for diretorio in self.diretorios:
+                resultado.extend(self._listar(diretorio))
+            return resultado
+
+    def suportado(self, arquivo):
+        """Indica se o arquivo entra no catálogo do seu diretório"""
+        extensoes = self.diretorios.get(Path(arquivo).parent)
+        return extensoes is not None and Path(arquivo).suffix.lower() in extensoes
+
+    def invalidar(self, diretorio=None):
+        """Descarta o cache de um diretório (ou de todos)"""
+        with self._lock:
+            if diretorio is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(Path(diretorio), None)
+
+    def _listar(self, diretorio):
+        try:
+            mtime = os.stat(diretorio).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        em_cache = self._cache.get(diretorio)
+        if em_cache and em_cache[0] == mtime:
+            return em_cache[1]
+
+        extensoes = self.diretorios[diretorio]
+        arquivos = []
+        with os.scandir(diretorio) as it:
+            for item in it:
+                if os.path.splitext(item.name)[1].lower() in extensoes and item.is_file():
+                    arquivos.append(diretorio / item.name)
+        arquivos.sort(key=lambda a: a.name.lower())
+        self._cache[diretorio] = (mtime, arquivos)
+        return arquivos
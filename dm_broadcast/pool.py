@@ -0,0 +1,137 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+from slack_sdk import WebClient
+
+from dm_broadcast.dm_cache import DMChannelCache
+from dm_broadcast.ratelimit import RateLimitedClient
+
+# =========================
+# POOL DE TOKENS DO SLACK
+# =========================
+# Erros que indicam token inutilizável (revogado, sem escopo...): sai do pool
+ERROS_TOKEN = {
+    "invalid_auth", "not_authed", "account_inactive", "token_revoked",
+    "token_expired", "missing_scope", "no_permission", "ekm_access_denied",
+}
+
+
+class TokenPoolError(Exception):
+    """Nenhum token do pool está em condições de enviar"""
+
+
+def tokens_do_ambiente(sufixo=""):
+    """Tokens de SLACK_BOT_TOKENS (separados por vírgula ou espaço) e SLACK_BOT_TOKEN, sem repetição
+
+    `sufixo` escolhe as variáveis de outro workspace (ex.: "_BR" lê SLACK_BOT_TOKEN_BR).
+    """
+    tokens = re.split(r"[\s,;]+", os.getenv(f"SLACK_BOT_TOKENS{sufixo}") or "")
+    tokens.append(os.getenv(f"SLACK_BOT_TOKEN{sufixo}") or "")
+    return list(dict.fromkeys(t.strip() for t in tokens if t.strip()))
+
+
+class TokenSlot:
+    """Um token do pool: cliente com limitador próprio, cache de DMs e saúde"""
+
+    def __init__(self, indice, token, cache_dir):
+        self.indice = indice
+        self.nome = f"token {indice + 1}"
+        self.client = RateLimitedClient(WebClient(token=token))
+        # Canais de DM são do bot: cada token tem o seu cache
+        self.dm_canais = DMChannelCache(self.client, cache_dir)
+        self.sucessos = 0
+        self.limitados = 0
+        self.esfriando_ate = 0.0  # monotônico; depois de um 429 o token fica de lado
+        self.desativado = None  # motivo, quando o token deixou de funcionar
+
+    def _peso(self, user_id):
+        """Peso do rendezvous hashing: o mesmo usuário cai sempre no mesmo token"""
+        digest = hashlib.blake2b(f"{self.indice}:{user_id}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+
+class TokenPool:
+    """Divide os envios entre vários tokens do mesmo workspace
+
+    Cada token tem o seu próprio RateLimiter, então a vazão total cresce
+    com o número de tokens (ex.: vários apps instalados no workspace).
+    Cada destinatário fica sempre com o mesmo token (rendezvous hashing);
+    se esse token tomar um 429 ou for revogado, os destinatários dele vão
+    para os demais sem reembaralhar os outros.
+    """
+
+    def __init__(self, tokens, cache_dir):
+        if not tokens:
+            raise TokenPoolError("Nenhum token informado")
+        self.slots = [TokenSlot(i, token, cache_dir) for i, token in enumerate(tokens)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.slots)
+
+    @property
+    def principal(self):
+        """Cliente usado para o diretório de usuários (primeiro token)"""
+        return self.slots[0].client
+
+    def ativos(self):
+        with self._lock:
+            return [s for s in self.slots if not s.desativado]
+
+    def escolher(self, user_id):
+        """Token que deve enviar para `user_id`, evitando os que estão esfriando"""
+        with self._lock:
+            candidatos = [s for s in self.slots if not s.desativado]
+            if not candidatos:
+                motivos = ", ".join(f"{s.nome}: {s.desativado}" for s in self.slots)
+                raise TokenPoolError(f"Nenhum token ativo ({motivos})")
+            agora = time.monotonic()
+            livres = [s for s in candidatos if s.esfriando_ate <= agora] or candidatos
+            return max(livres, key=lambda s: s._peso(user_id))
+
+    def todos_esfriando(self):
+        """True quando nenhum token ativo tem folga (aí sim vale reduzir a concorrência)"""
+        agora = time.monotonic()
+        with self._lock:
+            return all(s.esfriando_ate > agora for s in self.slots if not s.desativado)
+
+    def sucesso(self, slot):
+        with self._lock:
+            slot.sucessos += 1
+
+    def limitado(self, slot, segundos):
+        """429 no token: os próximos envios vão para outro até passar o Retry-After"""
+        with self._lock:
+            slot.limitados += 1
+            slot.esfriando_ate = max(slot.esfriando_ate, time.monotonic() + segundos)
+
+    def desativar(self, slot, motivo):
+        """Tira o token do pool; True se ele ainda estava ativo"""
+        with self._lock:
+            if slot.desativado:
+                return False
+            slot.desativado = motivo
+            return True
+
+    def salvar(self):
+        """Persiste os caches de DM de todos os tokens"""
+        for slot in self.slots:
+            slot.dm_canais.salvar()
+
+    def saude(self):
+        """Estado de cada token para logs e monitoramento"""
+        agora = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "token": s.nome,
+                    "estado": "desativado" if s.desativado else ("esfriando" if s.esfriando_ate > agora else "ativo"),
+                    "motivo": s.desativado,
+                    "sucessos": s.sucessos,
+                    "limitados": s.limitados,
+                }
+                for s in self.slots
+            ]
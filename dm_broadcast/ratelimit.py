@@ -0,0 +1,191 @@
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+from slack_sdk.errors import SlackApiError
+
+# =========================
+# LIMITES DA WEB API DO SLACK
+# =========================
+# Tiers documentados pelo Slack (requisições por minuto)
+TIERS = {1: 1, 2: 20, 3: 50, 4: 100}
+
+# metodo -> (requisições por segundo, rajada)
+LIMITES_METODO = {
+    "users.list": (TIERS[2] / 60, 2),
+    "conversations.open": (TIERS[3] / 60, 5),
+    "files.upload": (TIERS[2] / 60, 3),
+    # chat.postMessage não tem tier: ~1/s por canal, com teto amplo por workspace
+    "chat.postMessage": (300 / 60, 10),
+}
+LIMITE_POR_CANAL = (1.0, 3)
+LIMITE_PADRAO = (TIERS[3] / 60, 5)
+
+# Erros da API que valem nova tentativa (os demais são definitivos)
+ERROS_TRANSITORIOS = {
+    "ratelimited", "internal_error", "fatal_error",
+    "service_unavailable", "request_timeout",
+}
+
+# Nome do método Python no WebClient -> método da Web API
+METODOS_CLIENTE = {
+    "users_list": "users.list",
+    "conversations_open": "conversations.open",
+    "chat_postMessage": "chat.postMessage",
+    "files_upload_v2": "files.upload",
+}
+
+
+# Prioridade da campanha que está chamando a API (por thread)
+_contexto = threading.local()
+
+
+def prioridade_atual():
+    return getattr(_contexto, "prioridade", 0)
+
+
+@contextmanager
+def com_prioridade(prioridade):
+    """Chamadas feitas dentro do bloco disputam fichas com esta prioridade"""
+    anterior = prioridade_atual()
+    _contexto.prioridade = prioridade
+    try:
+        yield
+    finally:
+        _contexto.prioridade = anterior
+
+
+def retry_after(api_error, padrao=1.0):
+    """Lê o cabeçalho Retry-After de um SlackApiError (em segundos)"""
+    headers = getattr(api_error.response, "headers", None) or {}
+    for chave, valor in headers.items():
+        if chave.lower() == "retry-after":
+            if isinstance(valor, (list, tuple)):
+                valor = valor[0] if valor else padrao
+            try:
+                return float(valor)
+            except (TypeError, ValueError):
+                return padrao
+    return padrao
+
+
+class TokenBucket:
+    """Balde de fichas: `taxa` fichas por segundo, acumulando até `rajada`
+
+    Quando várias campanhas disputam o mesmo balde, a ficha vai primeiro
+    para quem espera com a maior prioridade.
+    """
+
+    def __init__(self, taxa, rajada=1):
+        self.taxa = taxa
+        self.rajada = rajada
+        self._fichas = float(rajada)
+        self._ultimo = time.monotonic()
+        self._pausado_ate = 0.0
+        self._esperando = collections.Counter()  # prioridade -> threads aguardando
+        self._lock = threading.Lock()
+
+    def _repor(self, agora):
+        decorrido = max(0.0, agora - self._ultimo)
+        self._fichas = min(self.rajada, self._fichas + decorrido * self.taxa)
+        self._ultimo = max(self._ultimo, agora)
+
+    def pausar(self, segundos):
+        """Bloqueia o balde inteiro por `segundos` (ex.: Retry-After de um 429)"""
+        with self._lock:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+            # Sem fichas acumuladas durante a pausa: recomeça devagar
+            self._fichas = 0.0
+            self._ultimo = self._pausado_ate
+
+    def adquirir(self, prioridade=0):
+        """Bloqueia até haver uma ficha disponível e a consome"""
+        with self._lock:
+            self._esperando[prioridade] += 1
+        try:
+            while True:
+                with self._lock:
+                    agora = time.monotonic()
+                    if agora < self._pausado_ate:
+                        espera = self._pausado_ate - agora
+                    else:
+                        self._repor(agora)
+                        mais_urgente = max(p for p, n in self._esperando.items() if n > 0)
+                        if self._fichas >= 1 and prioridade >= mais_urgente:
+                            self._fichas -= 1
+                            return
+                        # Sem ficha, ou há alguém mais urgente na frente
+                        espera = max((1 - self._fichas) / self.taxa, 0.01)
+                time.sleep(espera)
+        finally:
+            with self._lock:
+                self._esperando[prioridade] -= 1
+                if self._esperando[prioridade] <= 0:
+                    del self._esperando[prioridade]
+
+
+class RateLimiter:
+    """Conjunto de baldes por método da API (e por canal no chat.postMessage)"""
+
+    MAX_BALDES_CANAL = 5000
+
+    def __init__(self, limites=None):
+        self.limites = dict(LIMITES_METODO, **(limites or {}))
+        self._baldes = {}
+        self._baldes_canal = {}
+        self._lock = threading.Lock()
+
+    def balde(self, metodo):
+        """Retorna (criando se preciso) o balde de um método"""
+        with self._lock:
+            if metodo not in self._baldes:
+                self._baldes[metodo] = TokenBucket(*self.limites.get(metodo, LIMITE_PADRAO))
+            return self._baldes[metodo]
+
+    def pausar(self, metodo, segundos):
+        """Pausa o balde do método (todas as threads esperam o Retry-After)"""
+        self.balde(metodo).pausar(segundos)
+
+    def adquirir(self, metodo, canal=None, prioridade=None):
+        """Aguarda a vez de chamar `metodo` respeitando o limite do método e do canal"""
+        if prioridade is None:
+            prioridade = prioridade_atual()
+        if canal and metodo == "chat.postMessage":
+            self._balde_canal(canal).adquirir(prioridade)
+        self.balde(metodo).adquirir(prioridade)
+
+    def _balde_canal(self, canal):
+        with self._lock:
+            balde = self._baldes_canal.get(canal)
+            if balde is None:
+                if len(self._baldes_canal) >= self.MAX_BALDES_CANAL:
+                    # DMs recebem poucas mensagens por campanha; basta esquecer os antigos
+                    self._baldes_canal.clear()
+                balde = self._baldes_canal[canal] = TokenBucket(*LIMITE_POR_CANAL)
+            return balde
+
+
+class RateLimitedClient:
+    """Envolve o WebClient aplicando o RateLimiter antes de cada chamada conhecida"""
+
+    def __init__(self, client, limiter=None):
+        self.client = client
+        self.limiter = limiter or RateLimiter()
+
+    def __getattr__(self, nome):
+        atributo = getattr(self.client, nome)
+        metodo = METODOS_CLIENTE.get(nome)
+        if metodo is None or not callable(atributo):
+            return atributo
+
+        def chamar(*args, **kwargs):
+            self.limiter.adquirir(metodo, canal=kwargs.get("channel"))
+            try:
+                return atributo(*args, **kwargs)
+            except SlackApiError as e:
+                if e.response.get("error") == "ratelimited":
+                    self.limiter.pausar(metodo, retry_after(e))
+                raise
+
+        return chamar
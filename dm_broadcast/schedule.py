@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9: fica só com o tz_offset do diretório
+    ZoneInfo = None
+
+from dm_broadcast.template import formatar_offset
+
+# =========================
+# AGENDAMENTO E JANELAS DE ENTREGA
+# =========================
+FORMATO_INICIO = "AAAA-MM-DD HH:MM"
+FORMATO_JANELA = "HH:MM-HH:MM"
+
+
+class ScheduleError(Exception):
+    """Horário de início ou janela de entrega inválidos"""
+
+
+def ler_horario(texto):
+    """'HH:MM' -> time"""
+    try:
+        return datetime.strptime(texto.strip(), "%H:%M").time()
+    except ValueError:
+        raise ScheduleError(f"Horário inválido: '{texto}' (use HH:MM)") from None
+
+
+def ler_janela(texto):
+    """'09:00-18:00' -> (abertura, fechamento) no horário local do destinatário"""
+    partes = texto.split("-")
+    if len(partes) != 2:
+        raise ScheduleError(f"Janela inválida: '{texto}' (use {FORMATO_JANELA})")
+    abertura, fechamento = ler_horario(partes[0]), ler_horario(partes[1])
+    if abertura == fechamento:
+        raise ScheduleError(f"Janela vazia: '{texto}'")
+    return abertura, fechamento
+
+
+def ler_inicio(texto):
+    """Data/hora ISO -> datetime com fuso (sem fuso = horário desta máquina)"""
+    try:
+        inicio = datetime.fromisoformat(texto.strip())
+    except ValueError:
+        raise ScheduleError(f"Início inválido: '{texto}' (use {FORMATO_INICIO})") from None
+    return inicio.astimezone()
+
+
+def fuso_do_membro(membro):
+    """Fuso do membro: zona do Slack (com horário de verão) ou tz_offset; None se desconhecido"""
+    tz = membro.get("tz")
+    if not tz:
+        return None
+    if ZoneInfo is not None:
+        try:
+            return ZoneInfo(tz)
+        except (KeyError, ValueError):  # zona fora do tzdata instalado
+            pass
+    return timezone(timedelta(seconds=membro.get("tz_offset") or 0))
+
+
+def rotulo_fuso(membro):
+    """Nome do grupo de horário local de um membro"""
+    if not membro.get("tz"):
+        return "fuso local"
+    return f"{membro['tz']} ({formatar_offset(membro.get('tz_offset') or 0)})"
+
+
+class DeliverySchedule:
+    """Quando cada destinatário pode receber a campanha
+
+    `inicio` adia a campanha inteira; `janela` ("09:00-18:00") limita os
+    envios ao horário local de cada destinatário, calculado pelo `tz` do
+    diretório. Janelas que viram a meia-noite ("22:00-06:00") são aceitas.
+    Membros sem fuso no Slack usam o fuso desta máquina.
+    """
+
+    def __init__(self, inicio=None, janela=None):
+        self.inicio = ler_inicio(inicio) if inicio else None
+        self.janela = ler_janela(janela) if janela else None
+
+    @classmethod
+    def dos_parametros(cls, parametros):
+        return cls(parametros.get("inicio"), parametros.get("janela"))
+
+    def __bool__(self):
+        return bool(self.inicio or self.janela)
+
+    def aberta(self, hora):
+        """Indica se um horário local está dentro da janela"""
+        if not self.janela:
+            return True
+        abertura, fechamento = self.janela
+        if abertura < fechamento:
+            return abertura <= hora < fechamento
+        return hora >= abertura or hora < fechamento
+
+    def liberacao(self, membro, instante):
+        """Primeiro instante (epoch) a partir de `instante` em que o membro pode receber"""
+        momento = datetime.fromtimestamp(instante, timezone.utc)
+        if self.inicio and momento < self.inicio:
+            momento = self.inicio
+        if self.janela:
+            fuso = fuso_do_membro(membro)
+            local = momento.astimezone(fuso) if fuso else momento.astimezone()
+            if not self.aberta(local.time()):
+                # Próxima abertura no relógio local (aritmética de parede, respeita horário de verão)
+                abertura = datetime.combine(local.date(), self.janela[0], tzinfo=local.tzinfo)
+                if abertura <= local:
+                    abertura += timedelta(days=1)
+                momento = abertura
+        return max(instante, momento.timestamp())
+
+    def grupos(self, membros, instante):
+        """Destinatários agrupados por fuso: [(rótulo, quantidade, liberação)] pela ordem de saída"""
+        contagem = {}
+        for membro in membros:
+            rotulo = rotulo_fuso(membro)
+            if rotulo not in contagem:
+                # Todo o grupo tem o mesmo relógio local: basta calcular para um membro
+                contagem[rotulo] = [0, self.liberacao(membro, instante)]
+            contagem[rotulo][0] += 1
+        return sorted(
+            ((rotulo, quantidade, liberacao) for rotulo, (quantidade, liberacao) in contagem.items()),
+            key=lambda g: (g[2], g[0]),
+        )
+
+    def parametros(self):
+        """Forma normalizada guardada nos parâmetros da campanha (e usada na retomada)"""
+        return {
+            "inicio": self.inicio.isoformat(timespec="minutes") if self.inicio else None,
+            "janela": f"{self.janela[0]:%H:%M}-{self.janela[1]:%H:%M}" if self.janela else None,
+        }
@@ -0,0 +1,95 @@
+import re
+
+# =========================
+# TEMPLATE DE MENSAGEM
+# =========================
+# {{campo}} é obrigatório; {{campo|padrão}} usa o padrão quando o valor falta
+PADRAO_CAMPO = re.compile(r"\{\{\s*(\w+)\s*(?:\|([^}]*))?\}\}")
+
+# Campos que vêm do registro do usuário no diretório do Slack
+CAMPOS_DIRETORIO = {
+    "nome": "Nome completo (ou de exibição) do usuário",
+    "primeiro_nome": "Primeiro nome",
+    "nome_exibicao": "Nome de exibição no Slack",
+    "email": "E-mail do perfil",
+    "titulo": "Cargo/título do perfil",
+    "fuso": "Fuso horário (ex.: America/Sao_Paulo)",
+    "fuso_offset": "Deslocamento UTC (ex.: UTC-03:00)",
+}
+
+
+class TemplateError(Exception):
+    """Template inválido ou sem valores para algum destinatário"""
+
+
+def formatar_offset(segundos):
+    """Converte o tz_offset do Slack (segundos) em UTC±HH:MM"""
+    sinal = "-" if segundos < 0 else "+"
+    horas, resto = divmod(abs(int(segundos)), 3600)
+    return f"UTC{sinal}{horas:02d}:{resto // 60:02d}"
+
+
+def campos_membro(alvo, membro):
+    """Valores de template vindos do registro compacto do diretório"""
+    nome = membro.get("real_name") or membro.get("display_name") or alvo
+    return {
+        "nome": nome,
+        "primeiro_nome": nome.split()[0] if nome.split() else "",
+        "nome_exibicao": membro.get("display_name") or "",
+        "email": membro.get("email") or "",
+        "titulo": membro.get("title") or "",
+        "fuso": membro.get("tz") or "",
+        "fuso_offset": formatar_offset(membro["tz_offset"]) if membro.get("tz") else "",
+    }
+
+
+class Template:
+    """Mensagem compilada uma vez por campanha
+
+    O texto é dividido em literais e campos; renderizar é só um join
+    dos pedaços com os valores do destinatário.
+    """
+
+    def __init__(self, texto):
+        self.texto = texto
+        self._literais = []
+        self._campos = []  # (campo, padrão ou None)
+        pos = 0
+        for m in PADRAO_CAMPO.finditer(texto):
+            self._literais.append(texto[pos:m.start()])
+            self._campos.append((m.group(1).lower(), m.group(2)))
+            pos = m.end()
+        self._literais.append(texto[pos:])
+
+    @property
+    def campos(self):
+        """Todos os campos usados no texto"""
+        return {campo for campo, _ in self._campos}
+
+    def desconhecidos(self, disponiveis):
+        """Campos do texto que nenhuma fonte sabe preencher"""
+        return sorted(self.campos - set(disponiveis))
+
+    def faltantes(self, valores):
+        """Campos obrigatórios sem valor para um destinatário"""
+        return sorted({campo for campo, padrao in self._campos if padrao is None and not valores.get(campo)})
+
+    def validar(self, destinatarios):
+        """Confere todos os destinatários de uma vez: {alvo: [campos faltantes]}"""
+        problemas = {}
+        for alvo, valores in destinatarios:
+            faltando = self.faltantes(valores)
+            if faltando:
+                problemas[alvo] = faltando
+        return problemas
+
+    def renderizar(self, valores):
+        """Texto final para um destinatário"""
+        if not self._campos:
+            return self.texto
+        partes = [self._literais[0]]
+        for (campo, padrao), literal in zip(self._campos, self._literais[1:]):
+            valor = valores.get(campo)
+            partes.append(str(valor) if valor else (padrao or ""))
+            partes.append(literal)
+        return "".join(partes)
@@ -0,0 +1,62 @@
+import os
+import threading
+from pathlib import Path
+
+try:
+    from watchfiles import watch
+except ImportError:  # watchfiles é opcional: sem ele, só o botão Atualizar
+    watch = None
+
+# =========================
+# OBSERVADOR DE DIRETÓRIOS
+# =========================
+DEBOUNCE_MS = 300
+
+
+class DirectoryWatcher:
+    """Observa diretórios e entrega as mudanças em lotes por diretório
+
+    Eventos que chegam dentro da janela de debounce viram um único lote.
+    `ao_mudar(diretorio, arquivos)` é chamado uma vez por diretório
+    afetado com o conjunto de arquivos tocados; quem recebe confere o
+    estado atual no disco (o watchfiles não garante a ordem dos eventos).
+    """
+
+    def __init__(self, diretorios, ao_mudar, debounce_ms=DEBOUNCE_MS):
+        self.diretorios = {os.path.abspath(d): Path(d) for d in diretorios}
+        self.ao_mudar = ao_mudar
+        self.debounce_ms = debounce_ms
+        self._parar = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def disponivel():
+        return watch is not None
+
+    def iniciar(self):
+        """Começa a observar em segundo plano; False se watchfiles não está instalado"""
+        if watch is None:
+            return False
+        if self._thread and self._thread.is_alive():
+            return True
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def parar(self):
+        self._parar.set()
+
+    def _loop(self):
+        for lote in watch(*self.diretorios, debounce=self.debounce_ms,
+                          recursive=False, stop_event=self._parar):
+            por_diretorio = {}
+            for _, caminho in lote:
+                diretorio = self.diretorios.get(os.path.dirname(caminho))
+                if diretorio is not None:
+                    por_diretorio.setdefault(diretorio, set()).add(diretorio / os.path.basename(caminho))
+            for diretorio, arquivos in por_diretorio.items():
+                try:
+                    self.ao_mudar(diretorio, arquivos)
+                except Exception as e:
+                    print(f"⚠️ Falha ao aplicar mudanças em {diretorio}: {e}")
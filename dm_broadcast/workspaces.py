@@ -0,0 +1,239 @@
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.managers import SyncManager
+from pathlib import Path
+
+from dm_broadcast.attachments import AttachmentDigest
+from dm_broadcast.campaign import CampaignRunner, conectar
+from dm_broadcast.journal import Journal, JournalWriter
+from dm_broadcast.pool import tokens_do_ambiente
+
+# =========================
+# CAMPANHAS EM VÁRIOS WORKSPACES
+# =========================
+# Coluna opcional das listas que diz em qual workspace está o destinatário
+COLUNA_WORKSPACE = "workspace"
+
+
+def workspaces_do_ambiente():
+    """{nome: tokens} de SLACK_WORKSPACES (ex.: "br,us"); tokens em SLACK_BOT_TOKEN_BR, SLACK_BOT_TOKENS_BR..."""
+    nomes = re.split(r"[\s,;]+", os.getenv("SLACK_WORKSPACES") or "")
+    return {nome.lower(): tokens_do_ambiente("_" + nome.upper()) for nome in nomes if nome}
+
+
+def dividir_por_workspace(lista_de_origem, campos_lista, workspaces):
+    """({workspace: {alvo: lista}}, {alvo: workspace não configurado})
+
+    Sem a coluna `workspace` na lista, o destinatário vai para o primeiro workspace.
+    """
+    padrao = next(iter(workspaces))
+    grupos = {nome: {} for nome in workspaces}
+    desconhecidos = {}
+    for alvo, lista in lista_de_origem.items():
+        nome = (campos_lista(lista, alvo).get(COLUNA_WORKSPACE) or padrao).strip().lower()
+        if nome in grupos:
+            grupos[nome][alvo] = lista
+        else:
+            desconhecidos[alvo] = nome
+    return grupos, desconhecidos
+
+
+def _ignorar_sigint():
+    # Ctrl+C é tratado só pelo processo principal, que cancela os workspaces
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def executar_workspace(nome, tokens, cache_dir, db_path, checkpoint_dir, parametros, lista_de_origem,
+                       campos, campanha_id, canal_anexos, anexos_sha256, ttl, eventos, cancelado):
+    """Parte de um workspace, em um processo próprio: (concluida, totais, nao_encontrados)
+
+    O processo tem o seu pool de tokens, diretório, cache de DMs e
+    limitadores. As tentativas vão direto para o diário compartilhado e
+    o log volta ao processo principal pela fila `eventos`. O snapshot dos
+    anexos precisa bater com `anexos_sha256`, calculado pelo processo principal.
+    """
+    journal = Journal(db_path)
+    # Sem tokens só em simulação: o processo principal recusa workspaces reais sem token
+    pool, diretorio = conectar(tokens, cache_dir, ttl=ttl) if tokens else (None, None)
+    runner = None
+
+    def log(msg, tipo="info"):
+        eventos.put((nome, msg, tipo, dict(runner.totais)))
+
+    runner = CampaignRunner(
+        journal, parametros, lista_de_origem, checkpoint_dir, pool=pool, diretorio=diretorio,
+        campos_lista=lambda lista, alvo: campos.get(alvo, {}), canal_anexos=canal_anexos,
+        log=log, campanha_id=campanha_id, parcial=True, anexos_sha256=anexos_sha256,
+    )
+    terminou = threading.Event()
+
+    def vigiar():
+        while not terminou.wait(0.5):
+            if cancelado.is_set():
+                runner.cancelar()
+                return
+
+    threading.Thread(target=vigiar, daemon=True).start()
+    try:
+        concluida = runner.executar(None)
+    finally:
+        terminou.set()
+        journal.fechar()
+    return concluida, dict(runner.totais), runner.nao_encontrados
+
+
+class MultiWorkspaceRunner(CampaignRunner):
+    """Campanha em vários workspaces, com um processo por workspace
+
+    `workspaces` é {nome: tokens}. Cada destinatário vai para o workspace
+    da coluna `workspace` da sua lista (ou para o primeiro). Cada processo
+    tem os seus caches e limitadores, então a lentidão ou os 429 de um
+    workspace não seguram os outros; as tentativas de todos caem no mesmo
+    diário (SQLite em WAL aceita vários processos) e o log volta para cá
+    com o nome do workspace na frente.
+    """
+
+    def __init__(self, journal, parametros, lista_de_origem, checkpoint_dir, workspaces, cache_dir,
+                 campos_lista=None, canal_anexos=None, log=None, campanha_id=None, ao_iniciar=None,
+                 ttl=3600, simulacao=False):
+        super().__init__(journal, parametros, lista_de_origem, checkpoint_dir, campos_lista=campos_lista,
+                         canal_anexos=canal_anexos, log=log, campanha_id=campanha_id, ao_iniciar=ao_iniciar)
+        self.workspaces = workspaces
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.simulacao = simulacao
+
+    def _executar(self, log_csv):
+        log = self.log
+        parametros = self.parametros
+        grupos, desconhecidos = dividir_por_workspace(self.lista_de_origem, self.campos_lista, self.workspaces)
+        grupos = {nome: grupo for nome, grupo in grupos.items() if grupo}
+
+        gerenciador = None
+        diario = JournalWriter(self.journal, ao_falhar=self._diario_falhou)
+        try:
+            sem_token = [nome for nome in grupos if not self.simulacao and not self.workspaces[nome]]
+            if sem_token:
+                # Simular só uma parte gravaria SIMULADO, e a retomada nunca mandaria a DM de verdade
+                log(f"❌ Workspace(s) sem token: {', '.join(sem_token)} (defina SLACK_BOT_TOKEN_"
+                    f"{sem_token[0].upper()}); campanha não iniciada", "error")
+                return False
+            log(f"🌐 Campanha em {len(grupos)} workspace(s): "
+                + ", ".join(f"{nome} ({len(grupo)})" for nome, grupo in grupos.items()), "success")
+            # Só o SHA-256 (sem snapshot): cada processo tira o seu e confere com este
+            anexos_campanha = [AttachmentDigest(a) for a in parametros["arquivos"] if Path(a).exists()]
+            anexos_sha256 = ", ".join(a.sha256 for a in anexos_campanha)
+
+            if self.campanha_id is None:
+                self.campanha_id = self.journal.criar_campanha(
+                    listas=", ".join(parametros["listas"]),
+                    mensagem=parametros["mensagem"],
+                    arquivos=", ".join(a.nome for a in anexos_campanha),
+                    sha256=anexos_sha256,
+                    parametros=parametros,
+                )
+                self.journal.registrar_destinatarios(self.campanha_id, list(self.lista_de_origem.items()))
+            elif self.journal.campanha(self.campanha_id)["sha256"] != anexos_sha256:
+                log("⚠️ Os anexos mudaram desde o início da campanha", "warning")
+            campanha_id = self.campanha_id
+            if self.ao_iniciar:
+                self.ao_iniciar(campanha_id)
+
+            for alvo, nome in sorted(desconhecidos.items()):
+                log(f"⚠️ {alvo}: workspace '{nome}' não está em SLACK_WORKSPACES", "warning")
+                diario.escrever({
+                    "campanha_id": campanha_id,
+                    "alvo": alvo,
+                    "lista": self.lista_de_origem[alvo],
+                    "status": "NAO_ENCONTRADO",
+                    "erro": f"workspace {nome} não configurado",
+                })
+            self.nao_encontrados = sorted(desconhecidos)
+
+            parciais = {nome: dict(self.totais) for nome in grupos}
+            concluidas = {}
+            if grupos:
+                contexto = multiprocessing.get_context("spawn")
+                gerenciador = SyncManager(ctx=contexto)
+                gerenciador.start(_ignorar_sigint)
+                eventos = gerenciador.Queue()
+                cancelado = gerenciador.Event()
+                with ProcessPoolExecutor(max_workers=len(grupos), mp_context=contexto,
+                                         initializer=_ignorar_sigint) as executor:
+                    futuros = {
+                        executor.submit(
+                            executar_workspace, nome, [] if self.simulacao else self.workspaces[nome],
+                            str(self.cache_dir / nome), str(self.journal.db_path),
+                            str(Path(self.checkpoint_dir) / nome), parametros, grupo,
+                            {alvo: self.campos_lista(lista, alvo) for alvo, lista in grupo.items()},
+                            campanha_id, self.canal_anexos, anexos_sha256, self.ttl, eventos, cancelado,
+                        ): nome
+                        for nome, grupo in grupos.items()
+                    }
+                    rodando = set(futuros)
+                    while rodando:
+                        if self._cancelado.is_set() and not cancelado.is_set():
+                            cancelado.set()
+                        self._repassar(eventos, parciais, espera=0.2)
+                        rodando = {f for f in rodando if not f.done()}
+                    while self._repassar(eventos, parciais):
+                        pass
+
+                    for futuro, nome in futuros.items():
+                        try:
+                            concluidas[nome], parciais[nome], nao_encontrados = futuro.result()
+                        except Exception as e:
+                            log(f"❌ [{nome}] Processo do workspace falhou: {e}", "error")
+                            concluidas[nome], nao_encontrados = False, []
+                        self.nao_encontrados += nao_encontrados
+                self._somar(parciais)
+
+            if self._cancelado.is_set():
+                log("⏹️ Envio cancelado; use a retomada para continuar depois", "warning")
+                return False
+            pendentes = [nome for nome, concluida in concluidas.items() if not concluida]
+            if pendentes:
+                log(f"⚠️ Workspace(s) sem concluir: {', '.join(pendentes)}; use a retomada para continuar", "warning")
+                return False
+
+            self._resumo(self.nao_encontrados, anexos_campanha, log_csv)
+            for nome, totais in parciais.items():
+                log(f"   • {nome}: {totais['enviados']} enviada(s), {totais['erros']} erro(s)", "info")
+            self.concluida = True
+            return True
+
+        except Exception as ex:
+            log(f"❌ Erro inesperado: {str(ex)}", "error")
+            return False
+        finally:
+            diario.fechar()
+            if diario.erro is not None:
+                self.concluida = False
+            if self.campanha_id is not None:
+                # Um único CSV com as tentativas de todos os workspaces
+                self.journal.exportar_csv(self.campanha_id, log_csv)
+                self.journal.finalizar_campanha(self.campanha_id, "CONCLUIDA" if self.concluida else "INTERROMPIDA")
+            elif Path(log_csv).exists() and not Path(log_csv).stat().st_size:
+                Path(log_csv).unlink()
+            if gerenciador is not None:
+                gerenciador.shutdown()
+
+    def _repassar(self, eventos, parciais, espera=None):
+        """Mostra uma linha de log de um workspace e atualiza o progresso; False se a fila está vazia"""
+        try:
+            nome, msg, tipo, totais = eventos.get(timeout=espera) if espera else eventos.get_nowait()
+        except queue.Empty:
+            return False
+        parciais[nome] = totais
+        self._somar(parciais)
+        self.log(f"[{nome}] {msg}", tipo)
+        return True
+
+    def _somar(self, parciais):
+        with self._totais_lock:
+            self.totais = {chave: sum(p.get(chave, 0) for p in parciais.values()) for chave in self.totais}
@@ -0,0 +1,48 @@
+import pytest
+
+from dm_broadcast import audit
+from dm_broadcast.audit import BatchWriter
+
+
+class Instavel(BatchWriter):
+    """Writer que falha nas primeiras `falhas` gravações"""
+
+    def __init__(self, falhas, **kwargs):
+        self.falhas = falhas
+        self.gravadas = []
+        super().__init__(**kwargs)
+
+    def _gravar(self, linhas):
+        if self.falhas:
+            self.falhas -= 1
+            raise RuntimeError("database is locked")
+        self.gravadas.extend(linhas)
+
+
+@pytest.fixture(autouse=True)
+def backoff_curto(monkeypatch):
+    monkeypatch.setattr(audit, "ESPERA_BASE", 0.001)
+
+
+def test_gravar_e_abstrato():
+    with pytest.raises(TypeError):
+        BatchWriter()
+
+
+def test_lote_que_falha_e_gravado_na_nova_tentativa():
+    with Instavel(falhas=2, intervalo=0.01) as writer:
+        for i in range(5):
+            writer.escrever(i)
+    assert writer.gravadas == [0, 1, 2, 3, 4]
+    assert writer.erro is None
+
+
+def test_tentativas_esgotadas_avisam_quem_usa():
+    avisos = []
+    writer = Instavel(falhas=99, intervalo=0.01, max_tentativas=3,
+                      ao_falhar=lambda erro, linhas: avisos.append((str(erro), list(linhas))))
+    writer.escrever("a")
+    writer.fechar()
+    assert avisos == [("database is locked", ["a"])]
+    assert isinstance(writer.erro, RuntimeError)
+    assert writer.gravadas == []
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from dm_broadcast.dispatch import Dispatcher, RetryLater
+
+
+def rapido(**kwargs):
+    """Dispatcher com backoff curto para os testes não esperarem"""
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_max", 0.01)
+    return Dispatcher(**kwargs)
+
+
+def test_processa_todos_os_itens():
+    feitos = []
+    lock = threading.Lock()
+
+    def fn(item):
+        with lock:
+            feitos.append(item)
+
+    assert rapido(trabalhadores=4).executar(range(20), fn) is True
+    assert sorted(feitos) == list(range(20))
+
+
+def test_retry_later_reagenda_ate_dar_certo():
+    tentativas = {}
+
+    def fn(item):
+        tentativas[item] = tentativas.get(item, 0) + 1
+        if tentativas[item] < 3:
+            raise RetryLater(espera=0.001)
+
+    desistidos = []
+    assert rapido(trabalhadores=1).executar(["a"], fn, ao_desistir=lambda i, e: desistidos.append(i)) is True
+    assert tentativas == {"a": 3}
+    assert desistidos == []
+
+
+def test_desiste_depois_de_max_tentativas():
+    tentativas = []
+    desistidos = []
+
+    def fn(item):
+        tentativas.append(item)
+        raise RetryLater(erro="ratelimited")
+
+    assert rapido(max_tentativas=3).executar(
+        ["a"], fn, ao_desistir=lambda i, e: desistidos.append((i, e.erro))
+    ) is True
+    assert len(tentativas) == 3
+    assert desistidos == [("a", "ratelimited")]
+
+
+def test_erro_inesperado_nao_derruba_o_trabalhador():
+    feitos = []
+    desistidos = []
+
+    def fn(item):
+        if item == "ruim":
+            raise ValueError("quebrou")
+        feitos.append(item)
+
+    # Um único trabalhador: se a thread morresse, "depois" ficaria na fila
+    drenou = rapido(trabalhadores=1, max_tentativas=2).executar(
+        ["ruim", "depois"], fn, ao_desistir=lambda i, e: desistidos.append((i, e.erro))
+    )
+    assert drenou is True
+    assert feitos == ["depois"]
+    assert desistidos == [("ruim", "ValueError: quebrou")]
+
+
+def test_cancelado_informa_que_a_fila_nao_esvaziou():
+    dispatcher = rapido(trabalhadores=1)
+    feitos = []
+
+    def fn(item):
+        feitos.append(item)
+        dispatcher.cancelar()
+
+    assert dispatcher.executar(["a", "b", "c"], fn) is False
+    assert feitos == ["a"]
+
+
+def test_agenda_segura_o_item_ate_a_liberacao():
+    inicio = time.time()
+    liberacao = inicio + 0.3
+    saidas = {}
+
+    def fn(item):
+        saidas[item] = time.time()
+
+    agenda = lambda item, instante: max(instante, liberacao) if item == "depois" else instante
+    assert rapido(trabalhadores=2).executar(["depois", "agora"], fn, agenda=agenda) is True
+    assert saidas["agora"] < liberacao
+    assert saidas["depois"] >= liberacao - 0.01
+
+
+def test_429_em_sequencia_reduz_a_concorrencia():
+    def fn(item):
+        raise RetryLater(limitado=True)
+
+    dispatcher = rapido(trabalhadores=8, max_tentativas=2)
+    dispatcher.executar(["a", "b"], fn)
+    assert dispatcher.limite == 4.0
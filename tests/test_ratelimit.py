@@ -0,0 +1,34 @@
+import time
+
+from dm_broadcast.ratelimit import TokenBucket
+
+
+def cronometrar(fn):
+    inicio = time.monotonic()
+    fn()
+    return time.monotonic() - inicio
+
+
+def test_rajada_sai_sem_esperar():
+    balde = TokenBucket(taxa=1, rajada=3)
+    assert cronometrar(lambda: [balde.adquirir() for _ in range(3)]) < 0.05
+
+
+def test_pausar_bloqueia_o_balde():
+    balde = TokenBucket(taxa=1000, rajada=5)
+    balde.pausar(0.2)
+    assert cronometrar(balde.adquirir) >= 0.19
+
+
+def test_pausar_descarta_as_fichas_acumuladas():
+    balde = TokenBucket(taxa=20, rajada=5)
+    balde.pausar(0.1)
+    # Depois da pausa o balde recomeça vazio: a primeira ficha leva 1/taxa
+    assert cronometrar(balde.adquirir) >= 0.1 + 1 / 20 - 0.01
+
+
+def test_pausa_menor_nao_encurta_a_atual():
+    balde = TokenBucket(taxa=1000, rajada=5)
+    balde.pausar(0.3)
+    balde.pausar(0.05)
+    assert cronometrar(balde.adquirir) >= 0.29
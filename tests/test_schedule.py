@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from dm_broadcast.schedule import DeliverySchedule, ScheduleError
+
+
+def epoch(texto):
+    """'AAAA-MM-DD HH:MM' em UTC -> epoch"""
+    return datetime.fromisoformat(texto).replace(tzinfo=timezone.utc).timestamp()
+
+
+# 23:00 UTC: noite em São Paulo, manhã seguinte em Tóquio, madrugada em Lisboa
+NOITE_UTC = epoch("2026-10-20 23:00")
+
+
+def test_sem_agenda_libera_na_hora():
+    assert DeliverySchedule().liberacao({"tz": "America/Sao_Paulo"}, NOITE_UTC) == NOITE_UTC
+
+
+@pytest.mark.parametrize("tz, esperado", [
+    ("America/Sao_Paulo", "2026-10-21 12:00"),  # 20:00 local: espera as 09:00 do dia seguinte
+    ("Asia/Tokyo", "2026-10-21 00:00"),  # 08:00 local: espera uma hora
+    ("Europe/Lisbon", "2026-10-21 08:00"),  # 00:00 local (horário de verão): espera as 09:00
+])
+def test_janela_libera_na_proxima_abertura_local(tz, esperado):
+    agenda = DeliverySchedule(janela="09:00-18:00")
+    assert agenda.liberacao({"tz": tz}, NOITE_UTC) == epoch(esperado)
+
+
+def test_dentro_da_janela_libera_na_hora():
+    agenda = DeliverySchedule(janela="09:00-18:00")
+    # 15:00 UTC = 12:00 em São Paulo
+    instante = epoch("2026-10-20 15:00")
+    assert agenda.liberacao({"tz": "America/Sao_Paulo"}, instante) == instante
+
+
+def test_janela_que_vira_a_meia_noite():
+    agenda = DeliverySchedule(janela="22:00-06:00")
+    assert agenda.liberacao({"tz": "UTC"}, NOITE_UTC) == NOITE_UTC
+    assert agenda.liberacao({"tz": "UTC"}, epoch("2026-10-20 12:00")) == epoch("2026-10-20 22:00")
+
+
+def test_inicio_adia_e_depois_respeita_a_janela():
+    agenda = DeliverySchedule(inicio="2026-10-21T05:00+00:00", janela="09:00-18:00")
+    assert agenda.liberacao({"tz": "UTC"}, NOITE_UTC) == epoch("2026-10-21 09:00")
+    assert agenda.liberacao({"tz": "Asia/Tokyo"}, NOITE_UTC) == epoch("2026-10-21 05:00")
+
+
+def test_sem_zoneinfo_usa_tz_offset():
+    agenda = DeliverySchedule(janela="09:00-18:00")
+    membro = {"tz": "Zona/Inexistente", "tz_offset": -3 * 3600}
+    assert agenda.liberacao(membro, NOITE_UTC) == epoch("2026-10-21 12:00")
+
+
+def test_janela_invalida():
+    with pytest.raises(ScheduleError):
+        DeliverySchedule(janela="09:00")
+    with pytest.raises(ScheduleError):
+        DeliverySchedule(janela="09:00-09:00")